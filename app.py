@@ -1,9 +1,36 @@
+import io
 import os
+import re
+import csv
+import gzip
+import json
+import time
+import base64
 import shutil
-from flask import Flask, render_template_string, request, redirect, url_for, flash, session, send_file
+import sqlite3
+import tempfile
+import hmac
+import zlib
+import hashlib
+import mimetypes
+import threading
+from contextlib import contextmanager
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import click
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, stream_with_context, abort, jsonify, g, has_request_context, before_render_template, template_rendered
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from jinja2 import DictLoader, FileSystemBytecodeCache
+
+# Brotli is optional; without it static assets are precompressed with gzip only.
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # --- App Configuration ---
 # Creates the Flask application instance.
@@ -14,10 +41,95 @@ app.config['SECRET_KEY'] = os.urandom(24)
 
 # Sets the path for the SQLite database file.
 # os.path.abspath ensures the path is correct regardless of where the script is run.
-db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'movies.db')
+# FILMMAGRAPHY_DB_PATH points the app at a different file (e.g. for benchmarks).
+db_path = os.environ.get('FILMMAGRAPHY_DB_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'movies.db')
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# PRAGMAs applied to every new SQLite connection. WAL mode lets readers keep
+# working while a write commits, and synchronous=NORMAL is safe under WAL.
+# A negative cache_size is in KiB; mmap_size is in bytes.
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+# Number of movies shown per page of the collection, and the largest page size
+# a user may ask for through the 'per_page' query parameter.
+app.config['MOVIES_PER_PAGE'] = 50
+app.config['MAX_MOVIES_PER_PAGE'] = 200
+
+# Restored backups are copied into the live database this many pages at a time,
+# logging progress after each step. Database exports are streamed to the client
+# in chunks of EXPORT_CHUNK_SIZE bytes.
+app.config['BACKUP_PAGES_PER_STEP'] = 1024
+app.config['EXPORT_CHUNK_SIZE'] = 256 * 1024
+
+# Bulk movie imports are inserted and committed this many rows at a time.
+app.config['IMPORT_BATCH_SIZE'] = 1000
+
+# Most movies one batch edit request may change or delete.
+app.config['MAX_BATCH_EDIT_SIZE'] = 1000
+
+# Collection exports read this many rows from the database at a time.
+app.config['EXPORT_BATCH_SIZE'] = 1000
+
+# Password hashing. PASSWORD_HASH_METHOD is passed to werkzeug's
+# generate_password_hash and must spell out every parameter (e.g.
+# 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'); accounts hashed with anything
+# else are rehashed on their next login. Hashes run in a pool of
+# PASSWORD_HASH_WORKERS processes (0 hashes inline), with at most
+# PASSWORD_HASH_MAX_PENDING waiting or running at once; further requests wait up
+# to PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot before being turned away.
+app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'
+app.config['PASSWORD_HASH_WORKERS'] = 2
+app.config['PASSWORD_HASH_MAX_PENDING'] = 8
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = 2
+
+# Failed logins allowed per username and per client IP within the window (seconds)
+# before further attempts are refused without checking the password.
+app.config['LOGIN_MAX_FAILURES_PER_USERNAME'] = 5
+app.config['LOGIN_MAX_FAILURES_PER_IP'] = 20
+app.config['LOGIN_FAILURE_WINDOW'] = 300
+
+# Collection pages are cached in each worker process: at most
+# COLLECTION_CACHE_SIZE pages (0 disables the cache), each for up to
+# COLLECTION_CACHE_TTL seconds.
+app.config['COLLECTION_CACHE_SIZE'] = 500
+app.config['COLLECTION_CACHE_TTL'] = 300
+
+# SQL statements slower than this many seconds are logged as warnings.
+# METRICS_TOKEN, if set, lets scrapers read /metrics with an
+# "Authorization: Bearer <token>" header instead of an admin login.
+# SERVER_TIMING adds each response's SQL, render and total time in a
+# Server-Timing header; it is visible to every visitor, so leave it off
+# outside development.
+app.config['SLOW_QUERY_THRESHOLD'] = 0.1
+app.config['METRICS_TOKEN'] = None
+app.config['SERVER_TIMING'] = False
+
+# Changes returned per request by the sync feed, by default and at most.
+app.config['SYNC_BATCH_SIZE'] = 500
+app.config['MAX_SYNC_BATCH_SIZE'] = 2000
+
+# Directory for Jinja's on-disk compiled template cache, or None to keep compiled
+# templates in memory only.
+app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = None
+
+# Static assets are served under content-hashed names, so browsers may cache them
+# for this many seconds without revalidating.
+app.config['ASSET_MAX_AGE'] = 365 * 24 * 60 * 60
+
+# Text responses of at least COMPRESSION_MIN_SIZE bytes are compressed for clients
+# that accept it, with brotli (if installed) at BROTLI_QUALITY or gzip at GZIP_LEVEL.
+# Streamed responses are always compressed as they are sent.
+app.config['COMPRESSION_MIN_SIZE'] = 1024
+app.config['GZIP_LEVEL'] = 6
+app.config['BROTLI_QUALITY'] = 5
+
 # Configure upload folder for database imports
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -28,6 +140,19 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 db = SQLAlchemy(app)
 
 
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Applies the configured SQLITE_PRAGMAS to each new SQLite connection."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in app.config['SQLITE_PRAGMAS'].items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
 # --- HTML Templates (as Python strings) ---
 # This section contains all the HTML needed for the web pages.
 
@@ -38,15 +163,7 @@ BASE_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{{ title }} - Movie Collection</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        body { font-family: 'Inter', sans-serif; }
-        .form-container {
-            backdrop-filter: blur(10px);
-            -webkit-backdrop-filter: blur(10px);
-        }
-    </style>
+    <link href="{{ asset_url('css/app.css') }}" rel="stylesheet">
 </head>
 <body class="bg-gray-900 text-white">
     <div class="w-full max-w-5xl mx-auto p-4 sm:p-6 lg:p-8">
@@ -67,13 +184,15 @@ BASE_TEMPLATE = """
         {% endwith %}
 
         <!-- Main Content Block -->
-        {{ content|safe }}
+        {% block content %}{% endblock %}
     </div>
 </body>
 </html>
 """
 
 LOGIN_PAGE_CONTENT = """
+{% extends "base.html" %}
+{% block content %}
 <div class="flex flex-col items-center justify-center min-h-screen py-12">
     <h1 class="text-4xl font-bold text-center text-indigo-400 mb-8">Movie Collection Logger</h1>
     <div class="bg-gray-800 bg-opacity-75 p-8 rounded-2xl shadow-lg border border-gray-700 w-full max-w-md">
@@ -88,9 +207,12 @@ LOGIN_PAGE_CONTENT = """
         </p>
     </div>
 </div>
+{% endblock %}
 """
 
 REGISTER_PAGE_CONTENT = """
+{% extends "base.html" %}
+{% block content %}
 <div class="flex flex-col items-center justify-center min-h-screen py-12">
     <h1 class="text-4xl font-bold text-center text-indigo-400 mb-8">Movie Collection Logger</h1>
     <div class="bg-gray-800 bg-opacity-75 p-8 rounded-2xl shadow-lg border border-gray-700 w-full max-w-md">
@@ -105,13 +227,17 @@ REGISTER_PAGE_CONTENT = """
         </p>
     </div>
 </div>
+{% endblock %}
 """
 
 INDEX_PAGE_CONTENT = """
+{% extends "base.html" %}
+{% block content %}
 <div>
     <div class="flex flex-wrap justify-between items-center mb-8 gap-4">
         <h1 class="text-3xl font-bold text-indigo-400">My Movie Collection</h1>
         <div class="flex items-center gap-4">
+            <a href="{{ url_for('stats') }}" class="bg-blue-600 hover:bg-blue-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Statistics</a>
             {% if user.is_admin %}
             <a href="{{ url_for('admin_dashboard') }}" class="bg-yellow-600 hover:bg-yellow-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Admin Dashboard</a>
             {% endif %}
@@ -158,11 +284,27 @@ INDEX_PAGE_CONTENT = """
         </form>
     </div>
     
+    <!-- Bulk Import Form -->
+    <div class="bg-gray-800 p-6 rounded-2xl shadow-lg mb-8 border border-gray-700">
+        <div class="flex flex-wrap justify-between items-center mb-4 gap-4">
+            <h2 class="text-2xl font-semibold">Import &amp; Export</h2>
+            <div class="flex gap-2">
+                <a href="{{ url_for('export_movies', file_format='csv') }}" class="bg-green-600 hover:bg-green-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Export CSV</a>
+                <a href="{{ url_for('export_movies', file_format='jsonl') }}" class="bg-green-600 hover:bg-green-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Export JSON Lines</a>
+            </div>
+        </div>
+        <p class="text-sm text-gray-400 mb-4">Upload a CSV (with name, format, condition and barcode columns), JSON or JSON Lines file. Movies whose barcode is already in your collection are skipped.</p>
+        <form method="POST" action="{{ url_for('import_movies_upload') }}" enctype="multipart/form-data" class="flex flex-col sm:flex-row gap-4 items-center">
+            <input type="file" name="movies_file" accept=".csv,.json,.jsonl" class="w-full text-sm text-gray-400 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-indigo-600 file:text-white hover:file:bg-indigo-700" required>
+            <button type="submit" class="w-full sm:w-auto bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-3 px-6 rounded-lg transition duration-300">Import</button>
+        </form>
+    </div>
+
     <!-- Search and Filter Form -->
     <div class="bg-gray-800 p-6 rounded-2xl shadow-lg mb-8 border border-gray-700">
-        <form method="GET" action="{{ url_for('index') }}" class="grid grid-cols-1 md:grid-cols-3 gap-4 items-center">
+        <form method="GET" action="{{ url_for('index') }}" class="grid grid-cols-1 md:grid-cols-4 gap-4 items-center">
             <div class="md:col-span-1">
-                <input type="text" name="search" placeholder="Search by title..." value="{{ request.args.get('search', '') }}" class="w-full p-3 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500">
+                <input type="text" name="search" placeholder="Search by title or barcode..." value="{{ request.args.get('search', '') }}" class="w-full p-3 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500">
             </div>
             <div>
                 <select name="sort" class="w-full p-3 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500 h-[50px]">
@@ -170,20 +312,25 @@ INDEX_PAGE_CONTENT = """
                     <option value="name_desc" {% if request.args.get('sort') == 'name_desc' %}selected{% endif %}>Sort by Title (Z-A)</option>
                     <option value="date_added_desc" {% if request.args.get('sort') == 'date_added_desc' %}selected{% endif %}>Sort by Date Added (Newest)</option>
                     <option value="date_added_asc" {% if request.args.get('sort') == 'date_added_asc' %}selected{% endif %}>Sort by Date Added (Oldest)</option>
+                    <option value="relevance" {% if request.args.get('sort') == 'relevance' %}selected{% endif %}>Sort by Best Match (Search)</option>
                 </select>
             </div>
             <div>
                 <select name="filter_format" class="w-full p-3 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500 h-[50px]">
-                    <option value="">Filter by Format (All)</option>
-                    <option value="Blu-ray" {% if request.args.get('filter_format') == 'Blu-ray' %}selected{% endif %}>Blu-ray</option>
-                    <option value="DVD" {% if request.args.get('filter_format') == 'DVD' %}selected{% endif %}>DVD</option>
-                    <option value="4K UHD" {% if request.args.get('filter_format') == '4K UHD' %}selected{% endif %}>4K UHD</option>
-                    <option value="Digital" {% if request.args.get('filter_format') == 'Digital' %}selected{% endif %}>Digital</option>
-                    <option value="VHS" {% if request.args.get('filter_format') == 'VHS' %}selected{% endif %}>VHS</option>
-                    <option value="Other" {% if request.args.get('filter_format') == 'Other' %}selected{% endif %}>Other</option>
+                    <option value="">Filter by Format (All, {{ format_counts.values() | sum }})</option>
+                    {% for movie_format, count in format_counts.items() %}
+                    <option value="{{ movie_format }}" {% if request.args.get('filter_format') == movie_format %}selected{% endif %}>{{ movie_format }} ({{ count }})</option>
+                    {% endfor %}
+                </select>
+            </div>
+            <div>
+                <select name="per_page" class="w-full p-3 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500 h-[50px]">
+                    {% for size in [25, 50, 100, 200] %}
+                    <option value="{{ size }}" {% if per_page == size %}selected{% endif %}>{{ size }} per page</option>
+                    {% endfor %}
                 </select>
             </div>
-            <div class="md:col-span-3 text-center">
+            <div class="md:col-span-4 text-center">
                  <button type="submit" class="w-full md:w-auto bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-3 px-6 rounded-lg transition duration-300">Apply</button>
             </div>
         </form>
@@ -193,10 +340,30 @@ INDEX_PAGE_CONTENT = """
     <!-- Movie List -->
     <div class="bg-gray-800 p-6 rounded-2xl shadow-lg border border-gray-700">
         <h2 class="text-2xl font-semibold mb-4">Your Movies</h2>
+        {% if movies %}
+        <!-- Batch Edit: applies to the movies ticked below -->
+        <form id="batch-form" method="POST" action="{{ url_for('batch_movies') }}" class="flex flex-wrap items-center gap-2 mb-4">
+            <select name="batch-format" class="p-2 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500">
+                <option value="">Keep format</option>
+                {% for movie_format in format_choices %}
+                <option>{{ movie_format }}</option>
+                {% endfor %}
+            </select>
+            <select name="batch-condition" class="p-2 bg-gray-700 rounded-lg border border-gray-600 focus:outline-none focus:ring-2 focus:ring-indigo-500">
+                <option value="">Keep condition</option>
+                {% for condition in condition_choices %}
+                <option>{{ condition }}</option>
+                {% endfor %}
+            </select>
+            <button type="submit" name="action" value="update" class="bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Update Selected</button>
+            <button type="submit" name="action" value="delete" class="bg-red-600 hover:bg-red-800 text-white font-bold py-2 px-4 rounded-lg transition duration-300" onclick="return confirm('Are you sure you want to remove the selected movies?');">Delete Selected</button>
+        </form>
+        {% endif %}
         <div class="space-y-4">
         {% if movies %}
             {% for movie in movies %}
             <div class="flex items-center justify-between bg-gray-700 p-4 rounded-lg">
+                <input type="checkbox" name="movie_ids" value="{{ movie.id }}" form="batch-form" class="mr-4" aria-label="Select {{ movie.name }}">
                 <div class="flex-grow">
                     <p class="font-bold text-lg">{{ movie.name }}</p>
                     <p class="text-sm text-gray-400">
@@ -216,11 +383,28 @@ INDEX_PAGE_CONTENT = """
             <p class="text-gray-400 text-center py-4">No movies found. Try adjusting your search or add your first movie!</p>
         {% endif %}
         </div>
+
+        <!-- Pagination -->
+        {% if prev_url or next_url %}
+        <div class="flex justify-between items-center mt-6">
+            {% if prev_url %}
+            <a href="{{ prev_url }}" class="bg-gray-700 hover:bg-gray-600 text-white font-bold py-2 px-4 rounded-lg transition duration-300">&larr; Previous</a>
+            {% else %}
+            <span></span>
+            {% endif %}
+            {% if next_url %}
+            <a href="{{ next_url }}" class="bg-gray-700 hover:bg-gray-600 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Next &rarr;</a>
+            {% endif %}
+        </div>
+        {% endif %}
     </div>
 </div>
+{% endblock %}
 """
 
 ADMIN_PAGE_CONTENT = """
+{% extends "base.html" %}
+{% block content %}
 <div>
     <div class="flex justify-between items-center mb-8">
         <h1 class="text-3xl font-bold text-yellow-400">Admin Dashboard</h1>
@@ -231,20 +415,34 @@ ADMIN_PAGE_CONTENT = """
         <h2 class="text-2xl font-semibold mb-4">Database Management</h2>
         <div class="flex flex-col sm:flex-row gap-4">
             <a href="{{ url_for('admin_export_db') }}" class="w-full sm:w-auto text-center bg-green-600 hover:bg-green-700 text-white font-bold py-3 px-6 rounded-lg transition duration-300">Export Database Backup</a>
+            <a href="{{ url_for('admin_export_db', compress='gzip') }}" class="w-full sm:w-auto text-center bg-green-600 hover:bg-green-700 text-white font-bold py-3 px-6 rounded-lg transition duration-300">Export Compressed (.gz)</a>
             <form method="POST" action="{{ url_for('admin_import_db') }}" enctype="multipart/form-data" class="w-full sm:w-auto">
-                <input type="file" name="db_file" class="w-full text-sm text-gray-400 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-blue-600 file:text-white hover:file:bg-blue-700" required>
+                <input type="file" name="db_file" accept=".db,.gz" class="w-full text-sm text-gray-400 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-blue-600 file:text-white hover:file:bg-blue-700" required>
                 <button type="submit" class="w-full mt-2 sm:mt-0 sm:w-auto bg-blue-600 hover:bg-blue-700 text-white font-bold py-3 px-6 rounded-lg transition duration-300" onclick="return confirm('Are you sure? This will overwrite the current database.');">Import Database</button>
             </form>
         </div>
     </div>
 
+    <div class="bg-gray-800 p-6 rounded-2xl shadow-lg border border-gray-700 mb-8">
+        <h2 class="text-2xl font-semibold mb-4">Collection Cache</h2>
+        <p class="text-sm text-gray-400 mb-4">Counters for this server process since it started.</p>
+        <div class="grid grid-cols-2 sm:grid-cols-5 gap-4 text-center">
+            {% for label, value in [('Hits', cache_stats.hits), ('Misses', cache_stats.misses), ('Entries', cache_stats.entries ~ ' / ' ~ cache_stats.max_entries), ('Evictions', cache_stats.evictions), ('Invalidations', cache_stats.invalidations)] %}
+            <div class="bg-gray-700 p-4 rounded-lg">
+                <p class="text-sm text-gray-400">{{ label }}</p>
+                <p class="text-xl font-bold">{{ value }}</p>
+            </div>
+            {% endfor %}
+        </div>
+    </div>
+
     <div class="bg-gray-800 p-6 rounded-2xl shadow-lg border border-gray-700">
         <h2 class="text-2xl font-semibold mb-4">User Management</h2>
         <div class="space-y-4">
         {% if users %}
-            {% for user in users %}
+            {% for user, movie_count in users %}
             <div class="flex flex-col sm:flex-row items-center justify-between bg-gray-700 p-4 rounded-lg gap-4">
-                <p class="font-semibold text-lg">{{ user.username }}</p>
+                <p class="font-semibold text-lg">{{ user.username }} <span class="text-sm text-gray-400">{{ movie_count }} movie{{ '' if movie_count == 1 else 's' }}</span></p>
                 <form method="POST" action="{{ url_for('admin_reset_password', user_id=user.id) }}" class="flex items-center gap-2 w-full sm:w-auto">
                     <input type="password" name="new_password" placeholder="New Password" class="w-full sm:w-auto p-2 bg-gray-600 rounded-lg border border-gray-500 focus:outline-none focus:ring-2 focus:ring-yellow-500" required>
                     <button type="submit" class="bg-yellow-600 hover:bg-yellow-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Reset</button>
@@ -257,8 +455,462 @@ ADMIN_PAGE_CONTENT = """
         </div>
     </div>
 </div>
+{% endblock %}
+"""
+
+STATS_PAGE_CONTENT = """
+{% extends "base.html" %}
+{% block content %}
+<div>
+    <div class="flex flex-wrap justify-between items-center mb-8 gap-4">
+        <h1 class="text-3xl font-bold text-indigo-400">Collection Statistics</h1>
+        <a href="{{ url_for('index') }}" class="bg-indigo-600 hover:bg-indigo-700 text-white font-bold py-2 px-4 rounded-lg transition duration-300">Back to Collection</a>
+    </div>
+
+    <div class="bg-gray-800 p-6 rounded-2xl shadow-lg border border-gray-700 mb-8 text-center">
+        <p class="text-sm text-gray-400">Movies in your collection</p>
+        <p class="text-4xl font-bold">{{ stats.total }}</p>
+    </div>
+
+    <div class="grid grid-cols-1 md:grid-cols-2 gap-4 mb-8">
+        {% for heading, counts in [('By Format', stats.formats), ('By Condition', stats.conditions)] %}
+        <div class="bg-gray-800 p-6 rounded-2xl shadow-lg border border-gray-700">
+            <h2 class="text-2xl font-semibold mb-4">{{ heading }}</h2>
+            <div class="space-y-4">
+                {% for label, count in counts.items() %}
+                <div class="flex justify-between items-center bg-gray-700 p-3 rounded-lg">
+                    <span class="font-medium">{{ label }}</span>
+                    <span class="text-gray-400">{{ count }}{% if stats.total %} ({{ (100 * count / stats.total) | round | int }}%){% endif %}</span>
+                </div>
+                {% endfor %}
+            </div>
+        </div>
+        {% endfor %}
+    </div>
+
+    <div class="bg-gray-800 p-6 rounded-2xl shadow-lg border border-gray-700">
+        <h2 class="text-2xl font-semibold mb-4">Added per Month</h2>
+        <div class="space-y-4">
+        {% for month, count in stats.months %}
+            <div class="flex justify-between items-center bg-gray-700 p-3 rounded-lg">
+                <span class="font-medium">{{ month }}</span>
+                <span class="text-gray-400">{{ count }}</span>
+            </div>
+        {% else %}
+            <p class="text-gray-400 text-center py-4">No movies added yet.</p>
+        {% endfor %}
+        </div>
+    </div>
+</div>
+{% endblock %}
 """
 
+# Pages extend the base layout through Jinja inheritance. Templates are loaded
+# from this dictionary by name, so Jinja compiles each one once and reuses it
+# from its template cache instead of re-parsing the source on every request.
+TEMPLATES = {
+    'base.html': BASE_TEMPLATE,
+    'login.html': LOGIN_PAGE_CONTENT,
+    'register.html': REGISTER_PAGE_CONTENT,
+    'index.html': INDEX_PAGE_CONTENT,
+    'admin.html': ADMIN_PAGE_CONTENT,
+    'stats.html': STATS_PAGE_CONTENT,
+}
+app.jinja_loader = DictLoader(TEMPLATES)
+
+# Optionally persist compiled template bytecode so new worker processes skip compilation too.
+if app.config['TEMPLATE_BYTECODE_CACHE_DIR']:
+    os.makedirs(app.config['TEMPLATE_BYTECODE_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_BYTECODE_CACHE_DIR'])
+
+# --- Static Assets ---
+# Files in the static folder are read into memory at startup and served under
+# names that include a hash of their content (e.g. css/app.1a2b3c4d5e6f.css).
+# Changing a file changes its URL, so browsers can cache assets for a year and
+# never revalidate. Text assets are compressed once here rather than per request.
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml')
+
+
+def load_static_assets(static_folder):
+    """
+    Reads every file under static_folder.
+    Returns (assets keyed by hashed name, manifest mapping each file's name to its hashed name).
+    """
+    assets, manifest = {}, {}
+    for root, _, filenames in os.walk(static_folder):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, extension = os.path.splitext(name)
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+            # Precompressed variants, kept only when they are actually smaller.
+            encoded = {}
+            if mimetype.startswith(COMPRESSIBLE_TYPES):
+                if brotli is not None:
+                    encoded['br'] = brotli.compress(data, quality=11)
+                encoded['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            encoded = {encoding: body for encoding, body in encoded.items() if len(body) < len(data)}
+
+            hashed_name = f'{stem}.{digest}{extension}'
+            assets[hashed_name] = {'data': data, 'mimetype': mimetype, 'digest': digest, 'encoded': encoded}
+            manifest[name] = hashed_name
+    return assets, manifest
+
+
+STATIC_ASSETS, ASSET_MANIFEST = load_static_assets(app.static_folder) if os.path.isdir(app.static_folder) else ({}, {})
+
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file under its content-hashed name."""
+    if filename not in ASSET_MANIFEST:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=ASSET_MANIFEST[filename])
+
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Serves a static asset, precompressed when the client accepts it."""
+    static_asset = STATIC_ASSETS.get(filename)
+    if static_asset is None:
+        abort(404)
+
+    # Prefer brotli, then gzip, then the file as stored.
+    encoding = next((encoding for encoding in ('br', 'gzip')
+                     if encoding in static_asset['encoded'] and request.accept_encodings[encoding]), None)
+    response = Response(static_asset['encoded'][encoding] if encoding else static_asset['data'],
+                        mimetype=static_asset['mimetype'])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{static_asset['digest']}-{encoding or 'identity'}")
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['ASSET_MAX_AGE']
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+
+# --- Response Compression ---
+class GzipCompressor:
+    """Incremental gzip compressor with the same interface as brotli.Compressor."""
+
+    def __init__(self, level):
+        # wbits=31 writes a gzip header and trailer around the deflate stream.
+        self.compressobj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self.compressobj.compress(data)
+
+    def finish(self):
+        return self.compressobj.flush()
+
+
+def choose_encoding():
+    """Returns the best compression the client accepts ('br' or 'gzip'), or None."""
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def make_compressor(encoding):
+    """Creates an incremental compressor for the given content encoding."""
+    if encoding == 'br':
+        return brotli.Compressor(quality=app.config['BROTLI_QUALITY'])
+    return GzipCompressor(app.config['GZIP_LEVEL'])
+
+
+def compress_chunks(chunks, compressor):
+    """Compresses a response body iterable, yielding output as it becomes available."""
+    try:
+        for chunk in chunks:
+            data = compressor.process(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        # Closing the original iterable lets generators clean up if the client disconnects.
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+@app.after_request
+def compress_response(response):
+    """Compresses text responses and sets default caching headers."""
+    # Pages are built for the logged-in user, so only the browser may keep a copy,
+    # and it must check back before reusing it.
+    if 'Cache-Control' not in response.headers:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or not response.mimetype.startswith(COMPRESSIBLE_TYPES)
+            or response.cache_control.no_transform):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    compressor = make_compressor(encoding)
+    if response.is_sequence:
+        data = response.get_data()
+        if len(data) < app.config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.set_data(compressor.process(data) + compressor.finish())
+    else:
+        # Streamed responses are compressed chunk by chunk as they are sent.
+        response.response = compress_chunks(response.response, compressor)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed body differs byte for byte, so a strong validator becomes weak.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# --- Instrumentation ---
+# Metrics are kept in memory per worker process and exposed in the Prometheus
+# text format at /metrics.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+def format_labels(labels):
+    """Formats a label tuple as a Prometheus label set."""
+    if not labels:
+        return ''
+    pairs = ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                     for name, value in labels)
+    return '{' + pairs + '}'
+
+class Counter:
+    """A Prometheus counter with optional labels."""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{format_labels(labels)} {value}')
+        return lines
+
+class Histogram:
+    """A Prometheus histogram with optional labels."""
+
+    def __init__(self, name, description, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # Per label set: a count for each bucket, then the sum and total count.
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes how long the enclosed block takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{format_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{self.name}_bucket{format_labels(labels + (("le", "+Inf"),))} {series[-1]}')
+                lines.append(f'{self.name}_sum{format_labels(labels)} {series[-2]}')
+                lines.append(f'{self.name}_count{format_labels(labels)} {series[-1]}')
+        return lines
+
+REQUEST_SECONDS = Histogram('filmmagraphy_request_duration_seconds', 'Time spent handling requests, by route.')
+REQUEST_SQL_QUERIES = Histogram('filmmagraphy_request_sql_queries', 'SQL statements executed per request, by route.', COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram('filmmagraphy_request_sql_duration_seconds', 'Time spent in SQL per request, by route.')
+TEMPLATE_SECONDS = Histogram('filmmagraphy_template_render_seconds', 'Time spent rendering templates, by template.')
+PASSWORD_HASH_SECONDS = Histogram('filmmagraphy_password_hash_seconds', 'Time spent hashing or checking passwords, including queueing.')
+SLOW_QUERIES = Counter('filmmagraphy_slow_queries_total', 'SQL statements slower than SLOW_QUERY_THRESHOLD.')
+
+METRICS = [REQUEST_SECONDS, REQUEST_SQL_QUERIES, REQUEST_SQL_SECONDS, TEMPLATE_SECONDS, PASSWORD_HASH_SECONDS, SLOW_QUERIES]
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    """Remembers when a SQL statement started."""
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    """Adds a finished SQL statement to the request's totals and logs it if slow."""
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    if has_request_context() and 'sql_queries' in g:
+        g.sql_queries += 1
+        g.sql_seconds += elapsed
+    if elapsed >= app.config['SLOW_QUERY_THRESHOLD']:
+        SLOW_QUERIES.inc()
+        app.logger.warning("Slow query (%.3fs): %s", elapsed, ' '.join(statement.split()))
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    """Remembers when a template started rendering."""
+    g.render_started = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def stop_render_timer(sender, template, context, **extra):
+    """Records how long a template took to render."""
+    elapsed = time.perf_counter() - g.pop('render_started')
+    g.render_seconds = g.get('render_seconds', 0.0) + elapsed
+    TEMPLATE_SECONDS.observe(elapsed, template=template.name)
+
+@app.before_request
+def start_request_timer():
+    """Starts the per-request timers and counters."""
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+
+@app.after_request
+def record_request_metrics(response):
+    """Records request metrics and, if enabled, reports the breakdown in a Server-Timing header."""
+    if 'request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    # Using the route rather than the path keeps the number of label values bounded.
+    route = request.url_rule.endpoint if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, route=route, method=request.method, status=response.status_code)
+    REQUEST_SQL_QUERIES.observe(g.sql_queries, route=route)
+    REQUEST_SQL_SECONDS.observe(g.sql_seconds, route=route)
+
+    if not app.config['SERVER_TIMING']:
+        return response
+    timings = [f'sql;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_queries} queries"']
+    if 'render_seconds' in g:
+        timings.append(f'render;dur={g.render_seconds * 1000:.1f}')
+    timings.append(f'total;dur={elapsed * 1000:.1f}')
+    response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+
+# --- Password Hashing ---
+class HashingBusy(Exception):
+    """Raised when too many password hashes are already in progress."""
+
+# Created lazily in each process, so forked server workers get their own pool.
+password_pool = None
+password_pool_pid = None
+password_pool_slots = None
+password_pool_lock = threading.Lock()
+
+def run_password_job(func, *args):
+    """
+    Runs a CPU-heavy password function in the hashing process pool.
+
+    The number of jobs in flight is bounded; when the pool stays saturated for
+    PASSWORD_HASH_QUEUE_TIMEOUT seconds, HashingBusy is raised instead of
+    letting requests pile up behind it.
+    """
+    global password_pool, password_pool_pid, password_pool_slots
+    if not app.config['PASSWORD_HASH_WORKERS']:
+        return func(*args)
+
+    with password_pool_lock:
+        if password_pool is None or password_pool_pid != os.getpid():
+            password_pool = ProcessPoolExecutor(max_workers=app.config['PASSWORD_HASH_WORKERS'])
+            password_pool_pid = os.getpid()
+            password_pool_slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_MAX_PENDING'])
+        pool, slots = password_pool, password_pool_slots
+
+    if not slots.acquire(timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+        raise HashingBusy()
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        # A crashed worker breaks the whole pool; start a fresh one next time.
+        with password_pool_lock:
+            if password_pool is pool:
+                password_pool = None
+        raise HashingBusy()
+    finally:
+        slots.release()
+
+def hash_password(password):
+    """Hashes a password with the configured method, off the request thread."""
+    with PASSWORD_HASH_SECONDS.time(operation='hash'):
+        return run_password_job(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    """Checks a password against its hash, off the request thread."""
+    with PASSWORD_HASH_SECONDS.time(operation='verify'):
+        return run_password_job(check_password_hash, password_hash, password)
+
+
+# --- Login Throttling ---
+# Timestamps of recent failed logins, keyed by 'user:<name>' or 'ip:<address>'.
+login_failures = {}
+login_failures_lock = threading.Lock()
+
+# Bounds memory use: expired entries are pruned once this many keys are tracked.
+MAX_TRACKED_LOGIN_KEYS = 10000
+
+def login_retry_after(key, limit):
+    """Returns how many seconds a key must wait before trying again, or 0."""
+    window = app.config['LOGIN_FAILURE_WINDOW']
+    now = time.monotonic()
+    with login_failures_lock:
+        failures = login_failures.get(key)
+        if not failures:
+            return 0
+        while failures and failures[0] <= now - window:
+            failures.popleft()
+        if len(failures) < limit:
+            return 0
+        return int(failures[0] + window - now) + 1
+
+def record_login_failure(key):
+    """Remembers a failed login for a key."""
+    now = time.monotonic()
+    with login_failures_lock:
+        if len(login_failures) >= MAX_TRACKED_LOGIN_KEYS:
+            cutoff = now - app.config['LOGIN_FAILURE_WINDOW']
+            for stale in [k for k, v in login_failures.items() if not v or v[-1] <= cutoff]:
+                del login_failures[stale]
+        login_failures.setdefault(key, deque()).append(now)
+
+def clear_login_failures(key):
+    """Forgets the failed logins for a key after a successful login."""
+    with login_failures_lock:
+        login_failures.pop(key, None)
+
+
 # --- Database Models ---
 class User(db.Model):
     """User model for storing user accounts."""
@@ -266,13 +918,19 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(200), nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
+    # Bumped by database triggers whenever one of the user's movies changes.
+    collection_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     movies = db.relationship('Movie', backref='owner', lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash was made with other parameters than PASSWORD_HASH_METHOD."""
+        return self.password_hash.split('$', 1)[0] != app.config['PASSWORD_HASH_METHOD']
 
 class Movie(db.Model):
     """Movie model for storing movie collection data."""
@@ -280,10 +938,1005 @@ class Movie(db.Model):
     name = db.Column(db.String(200), nullable=False)
     format = db.Column(db.String(50), nullable=False)
     barcode = db.Column(db.String(50), nullable=True)
+    # The barcode as a 14-digit GTIN when it is a valid UPC or EAN, else None. See normalize_upc().
+    upc = db.Column(db.String(14), nullable=True)
     condition = db.Column(db.String(50), nullable=False)
     date_added = db.Column(db.DateTime, server_default=db.func.now())
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Every collection query filters by user, optionally by format, and sorts
+    # by name or date added. SQLite appends the row id to each index entry, so
+    # these also serve the id tiebreaker used by pagination.
+    __table_args__ = (
+        db.Index('ix_movie_user_name', 'user_id', 'name'),
+        db.Index('ix_movie_user_date_added', 'user_id', 'date_added'),
+        db.Index('ix_movie_user_format_name', 'user_id', 'format', 'name'),
+        db.Index('ix_movie_user_format_date_added', 'user_id', 'format', 'date_added'),
+        # Barcode scans and duplicate checks look movies up by normalized UPC.
+        db.Index('ix_movie_user_upc', 'user_id', 'upc'),
+    )
+
+class MovieChange(db.Model):
+    """
+    Change log entry for incremental sync.
+
+    Only the latest change to each movie is kept (an 'upsert' or a 'delete'
+    tombstone), so the log grows with the number of movies rather than edits.
+    The id is the sync sequence and is never reused. A 'reset' entry, written
+    after a database restore, tells clients to discard what they have synced.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    movie_id = db.Column(db.Integer, nullable=True)
+    op = db.Column(db.String(10), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_movie_change_user_id', 'user_id', 'id'),
+        db.Index('ix_movie_change_movie', 'movie_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+# Values offered by the add movie form, which bulk imports are validated against.
+FORMAT_CHOICES = ['Blu-ray', 'DVD', '4K UHD', 'Digital', 'VHS', 'Other']
+CONDITION_CHOICES = ['New (Sealed)', 'Like New', 'Very Good', 'Good', 'Acceptable']
+
+def normalize_upc(barcode):
+    """
+    Returns a UPC-A, EAN-13, EAN-8 or GTIN-14 barcode as a 14-digit GTIN, or None.
+
+    Spaces and dashes are ignored and the GS1 check digit must match. Padding
+    with leading zeros makes the same product compare equal however it was
+    scanned or typed (e.g. UPC-A 012345678905 and EAN-13 0012345678905), and
+    also restores zeros dropped by spreadsheets (12345678905).
+    """
+    if not barcode:
+        return None
+    digits = re.sub(r'[\s-]', '', barcode)
+    if not digits.isascii() or not digits.isdigit() or not 8 <= len(digits) <= 14:
+        return None
+    gtin = digits.zfill(14)
+    # Weights alternate 3, 1, 3, ... from the digit next to the check digit.
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(gtin[:-1])))
+    if (10 - total % 10) % 10 != int(gtin[-1]):
+        return None
+    return gtin
+
+# Records which schema migrations have been applied to the database.
+schema_version = db.Table(
+    'schema_version',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('applied_at', db.DateTime, server_default=db.func.now()),
+)
+
+
+# --- Schema Migrations ---
+# Each migration upgrades an existing database by one step and must be safe to
+# re-run, since a fresh database created by db.create_all() already has the
+# latest schema. Append new migrations to the end of MIGRATIONS; never reorder.
+# Listed by name: indexes added to the model later belong to their own migration,
+# which may first have to add the columns they cover.
+MOVIE_PAGE_INDEXES = ['ix_movie_user_name', 'ix_movie_user_date_added',
+                      'ix_movie_user_format_name', 'ix_movie_user_format_date_added']
+
+def add_movie_indexes(conn):
+    """Adds the composite indexes used by the collection page."""
+    for index in Movie.__table__.indexes:
+        if index.name in MOVIE_PAGE_INDEXES:
+            index.create(conn, checkfirst=True)
+
+# On SQLite, every insert, update or delete of a movie bumps its owner's
+# collection version in the same transaction, whichever code path made it.
+COLLECTION_VERSION_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS movie_version_insert AFTER INSERT ON movie BEGIN
+        UPDATE "user" SET collection_version = collection_version + 1 WHERE id = new.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movie_version_delete AFTER DELETE ON movie BEGIN
+        UPDATE "user" SET collection_version = collection_version + 1 WHERE id = old.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movie_version_update AFTER UPDATE ON movie BEGIN
+        UPDATE "user" SET collection_version = collection_version + 1 WHERE id IN (old.user_id, new.user_id);
+    END""",
+]
+
+def add_collection_versions(conn):
+    """Adds the per-user collection version and the triggers that maintain it."""
+    columns = {column['name'] for column in db.inspect(conn).get_columns('user')}
+    if 'collection_version' not in columns:
+        conn.execute(db.text('ALTER TABLE "user" ADD COLUMN collection_version INTEGER NOT NULL DEFAULT 0'))
+    if conn.dialect.name == 'sqlite':
+        for statement in COLLECTION_VERSION_TRIGGERS:
+            conn.execute(db.text(statement))
+
+# Replaces the collection version triggers: on SQLite, every movie change bumps
+# the owner's collection version and records the change in the sync log,
+# superseding any earlier log entry for the same movie and user.
+CHANGE_LOG_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS movie_change_insert AFTER INSERT ON movie BEGIN
+        UPDATE "user" SET collection_version = collection_version + 1 WHERE id = new.user_id;
+        DELETE FROM movie_change WHERE movie_id = new.id AND user_id = new.user_id;
+        INSERT INTO movie_change(user_id, movie_id, op) VALUES (new.user_id, new.id, 'upsert');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movie_change_delete AFTER DELETE ON movie BEGIN
+        UPDATE "user" SET collection_version = collection_version + 1 WHERE id = old.user_id;
+        DELETE FROM movie_change WHERE movie_id = old.id AND user_id = old.user_id;
+        INSERT INTO movie_change(user_id, movie_id, op) VALUES (old.user_id, old.id, 'delete');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movie_change_update AFTER UPDATE ON movie BEGIN
+        UPDATE "user" SET collection_version = collection_version + 1 WHERE id IN (old.user_id, new.user_id);
+        DELETE FROM movie_change WHERE movie_id IN (old.id, new.id) AND user_id IN (old.user_id, new.user_id);
+        INSERT INTO movie_change(user_id, movie_id, op)
+            SELECT old.user_id, old.id, 'delete' WHERE old.user_id != new.user_id OR old.id != new.id;
+        INSERT INTO movie_change(user_id, movie_id, op) VALUES (new.user_id, new.id, 'upsert');
+    END""",
+]
+
+def add_change_log(conn):
+    """Adds the sync change log, seeded with an entry for every existing movie."""
+    MovieChange.__table__.create(conn, checkfirst=True)
+    if conn.dialect.name == 'sqlite':
+        for trigger in ('movie_version_insert', 'movie_version_delete', 'movie_version_update'):
+            conn.execute(db.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        for statement in CHANGE_LOG_TRIGGERS:
+            conn.execute(db.text(statement))
+    if conn.execute(db.select(MovieChange.id).limit(1)).first() is None:
+        conn.execute(db.insert(MovieChange).from_select(
+            ['user_id', 'movie_id', 'op'],
+            db.select(Movie.user_id, Movie.id, db.literal('upsert')).order_by(Movie.id),
+        ))
+
+def add_normalized_upcs(conn):
+    """Adds the indexed normalized UPC column and fills it in for existing barcodes."""
+    columns = {column['name'] for column in db.inspect(conn).get_columns('movie')}
+    if 'upc' not in columns:
+        conn.execute(db.text('ALTER TABLE movie ADD COLUMN upc VARCHAR(14)'))
+    next(index for index in Movie.__table__.indexes if index.name == 'ix_movie_user_upc').create(conn, checkfirst=True)
+    updates = [{'movie_id': movie_id, 'new_upc': normalize_upc(barcode)} for movie_id, barcode in
+               conn.execute(db.select(Movie.id, Movie.barcode).where(Movie.barcode.isnot(None), Movie.upc.is_(None)))]
+    updates = [update for update in updates if update['new_upc']]
+    if updates:
+        conn.execute(db.update(Movie).where(Movie.id == db.bindparam('movie_id')).values(upc=db.bindparam('new_upc')),
+                     updates)
+
+MIGRATIONS = [
+    add_movie_indexes,
+    add_collection_versions,
+    add_change_log,
+    add_normalized_upcs,
+]
+
+def run_migrations():
+    """Applies any migrations the database has not seen yet, in order."""
+    applied = []
+    with db.engine.connect() as conn:
+        current = conn.execute(db.select(db.func.max(schema_version.c.version))).scalar() or 0
+    for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+        with db.engine.begin() as conn:
+            migration(conn)
+            conn.execute(schema_version.insert().values(version=version))
+        app.logger.info("Applied schema migration %d (%s)", version, migration.__name__)
+        applied.append(version)
+    return applied
+
+
+# --- Full-Text Search ---
+# On SQLite, movie titles and barcodes are mirrored into an FTS5 index that is
+# kept in sync by triggers, so every write path (the routes, imports, or any
+# other tool touching the database) updates it automatically.
+movie_fts = db.table('movie_fts', db.column('rowid'), db.column('rank'))
+
+# Set by init_search_index() once the index is known to exist.
+fts_enabled = False
+
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS movie_fts USING fts5(
+        name, barcode,
+        content='movie', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS movie_fts_insert AFTER INSERT ON movie BEGIN
+        INSERT INTO movie_fts(rowid, name, barcode) VALUES (new.id, new.name, new.barcode);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movie_fts_delete AFTER DELETE ON movie BEGIN
+        INSERT INTO movie_fts(movie_fts, rowid, name, barcode) VALUES ('delete', old.id, old.name, old.barcode);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS movie_fts_update AFTER UPDATE ON movie BEGIN
+        INSERT INTO movie_fts(movie_fts, rowid, name, barcode) VALUES ('delete', old.id, old.name, old.barcode);
+        INSERT INTO movie_fts(rowid, name, barcode) VALUES (new.id, new.name, new.barcode);
+    END""",
+]
+
+def init_search_index(rebuild=False):
+    """
+    Creates the FTS5 search index if the database supports it.
+
+    The index is (re)built from the movie table when it is first created, or
+    when rebuild is True (e.g. after a database import). Other databases, or
+    SQLite builds without FTS5, fall back to LIKE searches.
+    """
+    global fts_enabled
+    fts_enabled = False
+    if db.engine.dialect.name != 'sqlite':
+        return False
+
+    try:
+        with db.engine.begin() as conn:
+            exists = conn.execute(db.text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movie_fts'"
+            )).first() is not None
+            for statement in SEARCH_INDEX_DDL:
+                conn.execute(db.text(statement))
+            if rebuild or not exists:
+                conn.execute(db.text("INSERT INTO movie_fts(movie_fts) VALUES ('rebuild')"))
+    except db.exc.OperationalError as e:
+        app.logger.warning("Full-text search unavailable, using LIKE searches: %s", e)
+        return False
+
+    fts_enabled = True
+    return True
+
+def build_fts_query(search_term):
+    """
+    Turns free-form user input into a safe FTS5 query.
+
+    Every word becomes a quoted prefix term, so "matr rel" matches
+    "The Matrix Reloaded" and no input can inject FTS5 query syntax.
+    Returns None if the input contains no searchable words.
+    """
+    words = re.findall(r'\w+', search_term)
+    if not words:
+        return None
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def init_db(rebuild_search_index=False):
+    """Creates missing tables, upgrades the schema and prepares the search index."""
+    db.create_all()
+    run_migrations()
+    init_search_index(rebuild=rebuild_search_index)
+
+
+# --- Pagination Helpers ---
+# Each sort mode maps to the expression it orders by and whether it is descending.
+# The movie id is always used as a tiebreaker in the same direction, so the
+# ordering is total and a (value, id) pair identifies a position in the list.
+# Dates are compared as the text SQLite stores, matching its own ordering.
+SORT_OPTIONS = {
+    'name_asc': (Movie.name, False),
+    'name_desc': (Movie.name, True),
+    'date_added_desc': (db.type_coerce(Movie.date_added, db.String), True),
+    'date_added_asc': (db.type_coerce(Movie.date_added, db.String), False),
+}
+
+def encode_cursor(value, movie_id):
+    """Encodes a position in the sort order into an opaque, URL-safe cursor."""
+    raw = json.dumps([value, movie_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decodes a cursor back into a (value, id) pair, or None if it is invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, movie_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(value, (str, int, float, type(None))) or not isinstance(movie_id, int):
+        return None
+    return value, movie_id
+
+def paginate_keyset(query, sort_key, descending, per_page, after=None, before=None):
+    """
+    Applies keyset pagination to a movie query.
+
+    Instead of OFFSET, rows are located relative to the sort key of the last
+    (or first) row of the previous page, so every page costs the same
+    regardless of how deep into the collection it is.
+    Returns (movies, next_cursor, prev_cursor).
+    """
+    position = decode_cursor(before or after) if (before or after) else None
+    backwards = position is not None and bool(before)
+
+    # Walking backwards means reading the list in reverse and flipping it afterwards.
+    reverse = descending != backwards
+    if reverse:
+        order = (sort_key.desc(), Movie.id.desc())
+    else:
+        order = (sort_key.asc(), Movie.id.asc())
+
+    # A row comparison with NULL is never true, and SQLite sorts NULL sort keys
+    # (e.g. movies without a date added) before all others. So the rows past a
+    # position may come in two segments: the NULLs, by id, and the rest.
+    segments = [query]
+    if position is not None:
+        value, movie_id = position
+        if value is None:
+            nulls = query.filter(sort_key.is_(None), Movie.id < movie_id if reverse else Movie.id > movie_id)
+            segments = [nulls] if reverse else [nulls, query.filter(sort_key.isnot(None))]
+        elif reverse:
+            segments = [query.filter(db.tuple_(sort_key, Movie.id) < db.tuple_(value, movie_id)),
+                        query.filter(sort_key.is_(None))]
+        else:
+            segments = [query.filter(db.tuple_(sort_key, Movie.id) > db.tuple_(value, movie_id))]
+
+    # The sort key is selected alongside each movie so cursors carry exactly
+    # the value the database compares. One extra row tells us if there is more.
+    rows = []
+    for segment in segments:
+        rows += segment.order_by(*order).add_columns(sort_key).limit(per_page + 1 - len(rows)).all()
+        if len(rows) > per_page:
+            break
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, position is not None
+
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0][1], rows[0][0].id) if rows and has_prev else None
+    return [movie for movie, _ in rows], next_cursor, prev_cursor
+
+def get_per_page(args):
+    """Reads the requested page size, clamped to the configured limits."""
+    per_page = args.get('per_page', app.config['MOVIES_PER_PAGE'], type=int)
+    return max(1, min(per_page, app.config['MAX_MOVIES_PER_PAGE']))
+
+def query_collection(user_id, args):
+    """
+    Loads one page of a user's movies as requested by the query string.
+
+    Understands the 'search', 'sort', 'filter_format', 'per_page', 'after' and
+    'before' parameters, and is shared by the collection page and the API.
+    Returns (movies, next_cursor, prev_cursor).
+    """
+    # Base query for the user's movies
+    query = Movie.query.filter_by(user_id=user_id)
+
+    # Sort
+    sort_by = args.get('sort', 'name_asc')
+    if sort_by != 'relevance' and sort_by not in SORT_OPTIONS:
+        sort_by = 'name_asc'
+
+    # Search
+    search_term = args.get('search')
+    fts_query = build_fts_query(search_term) if search_term and fts_enabled else None
+    if fts_query:
+        match = db.literal_column('movie_fts').op('MATCH')(fts_query)
+        if sort_by == 'relevance':
+            # Joining the index exposes its bm25 rank (lower is better) as the sort key.
+            query = query.join(movie_fts, movie_fts.c.rowid == Movie.id).filter(match)
+        else:
+            query = query.filter(Movie.id.in_(db.select(movie_fts.c.rowid).where(match)))
+    elif search_term:
+        query = query.filter(db.or_(Movie.name.ilike(f'%{search_term}%'),
+                                    Movie.barcode.ilike(f'%{search_term}%')))
+
+    # Relevance only makes sense for an indexed search.
+    if sort_by == 'relevance' and fts_query:
+        sort_key, descending = movie_fts.c.rank, False
+    else:
+        sort_key, descending = SORT_OPTIONS.get(sort_by, SORT_OPTIONS['name_asc'])
+
+    # Filter
+    filter_format = args.get('filter_format')
+    if filter_format:
+        query = query.filter(Movie.format == filter_format)
+
+    # Paginate
+    return paginate_keyset(
+        query, sort_key, descending, get_per_page(args),
+        after=args.get('after'),
+        before=args.get('before'),
+    )
+
+
+# --- Collection Cache ---
+class CollectionCache:
+    """
+    Thread-safe LRU cache of collection pages with a time-to-live.
+
+    Keys start with the user id and the user's collection version, so a page
+    cached before any change to the collection can never be served after it,
+    even when the change was made by another worker process. Entries are also
+    dropped eagerly when this process changes a collection.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        """Returns the cached value for a key, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.counters['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Stores a value, evicting the least recently used entries beyond the size limit."""
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate_user(self, user_id):
+        """Drops every cached page of one user's collection."""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == user_id]:
+                del self.entries[key]
+            self.counters['invalidations'] += 1
+
+    def clear(self):
+        """Drops every cached page."""
+        with self.lock:
+            self.entries.clear()
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        """Returns the hit/miss counters and the current number of entries."""
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries), max_entries=self.max_entries)
+
+collection_cache = CollectionCache(app.config['COLLECTION_CACHE_SIZE'], app.config['COLLECTION_CACHE_TTL'])
+
+# Query string parameters that select a collection page.
+COLLECTION_QUERY_PARAMS = ('search', 'sort', 'filter_format', 'per_page', 'after', 'before')
+
+def movie_to_dict(movie):
+    """Serializes a movie for the API and the collection cache."""
+    return {
+        'id': movie.id,
+        'name': movie.name,
+        'format': movie.format,
+        'condition': movie.condition,
+        'barcode': movie.barcode,
+        'upc': movie.upc,
+        'date_added': movie.date_added.isoformat(sep=' ') if movie.date_added else None,
+    }
+
+def get_collection_version(user_id):
+    """Reads a user's current collection version straight from the database."""
+    return db.session.scalar(db.select(User.collection_version).where(User.id == user_id))
+
+def cached_collection_page(user_id, version, args):
+    """
+    Returns query_collection() results for a version of a user's collection.
+
+    Movies are returned as plain dicts, shared with other requests through the
+    cache, so callers must not modify them.
+    """
+    key = (user_id, version) + tuple(args.get(name) for name in COLLECTION_QUERY_PARAMS)
+    page = collection_cache.get(key)
+    if page is None:
+        movies, next_cursor, prev_cursor = query_collection(user_id, args)
+        page = ([movie_to_dict(movie) for movie in movies], next_cursor, prev_cursor)
+        collection_cache.set(key, page)
+    return page
+
+
+# --- Collection Statistics ---
+def grouped_counts(user_id, column):
+    """Counts a user's movies per value of a column with a single GROUP BY."""
+    return dict(db.session.execute(
+        db.select(column, db.func.count()).where(Movie.user_id == user_id).group_by(column)
+    ).all())
+
+def format_counts(user_id):
+    """Counts a user's movies per format, answered from the (user_id, format, ...) indexes alone."""
+    return dict.fromkeys(FORMAT_CHOICES, 0) | grouped_counts(user_id, Movie.format)
+
+def collection_stats(user_id):
+    """
+    Counts a user's movies in total, per format, per condition and per month added.
+
+    Each breakdown is a single GROUP BY, so no movie rows are loaded. Every
+    offered format and condition is listed, with zero counts if unused.
+    """
+    formats = format_counts(user_id)
+    conditions = dict.fromkeys(CONDITION_CHOICES, 0) | grouped_counts(user_id, Movie.condition)
+    month = db.func.strftime('%Y-%m', Movie.date_added)
+    months = db.session.execute(
+        db.select(month, db.func.count()).where(Movie.user_id == user_id).group_by(month).order_by(month.desc())
+    ).all()
+    return {
+        'total': sum(formats.values()),
+        'formats': formats,
+        'conditions': conditions,
+        'months': [(month, count) for month, count in months if month],
+    }
+
+def cached_collection_stats(user_id, version, compute=collection_stats):
+    """Returns compute(user_id) for a version of a user's collection, through the collection cache."""
+    key = (user_id, version, compute.__name__)
+    stats = collection_cache.get(key)
+    if stats is None:
+        stats = compute(user_id)
+        collection_cache.set(key, stats)
+    return stats
+
+
+# --- Database Backup ---
+def backup_database(dest_path):
+    """
+    Copies the live database into dest_path using SQLite's online backup API.
+
+    The copy is made in one step from a pooled connection, so it is always a
+    consistent snapshot. In WAL mode that read does not block writers, whereas a
+    copy made in several steps starts over whenever another connection writes
+    and may never finish on a busy site.
+    """
+    raw_conn = db.engine.raw_connection()
+    try:
+        dest = sqlite3.connect(dest_path)
+        try:
+            raw_conn.driver_connection.backup(dest, pages=-1)
+        finally:
+            dest.close()
+    finally:
+        raw_conn.close()
+
+def remove_database_file(path):
+    """Deletes a database file along with any WAL, shared-memory or journal file beside it."""
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def stream_file(path, compress=False):
+    """Yields a file in chunks, optionally gzip-compressed."""
+    chunk_size = app.config['EXPORT_CHUNK_SIZE']
+    # wbits=31 makes zlib write a gzip header and trailer.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
+
+# Columns every importable backup must have. Anything newer is added by migrations.
+REQUIRED_BACKUP_COLUMNS = {
+    'user': {'id', 'username', 'password_hash', 'is_admin'},
+    'movie': {'id', 'name', 'format', 'barcode', 'condition', 'date_added', 'user_id'},
+}
+
+# Serializes restores within this process; SQLite's write lock covers other workers.
+restore_lock = threading.Lock()
+
+def validate_backup(path):
+    """
+    Checks that an uploaded file is a healthy database this app can use.
+
+    Raises ValueError describing the first problem found.
+    """
+    try:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    except sqlite3.Error as e:
+        raise ValueError(f"the file could not be opened as a database ({e})")
+    try:
+        try:
+            result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"the file is not a valid SQLite database ({e})")
+        if result != 'ok':
+            raise ValueError(f"the database failed its integrity check ({result})")
+
+        for table, required in REQUIRED_BACKUP_COLUMNS.items():
+            columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+            missing = required - columns
+            if missing:
+                raise ValueError(f"the '{table}' table is missing or lacks columns: {', '.join(sorted(missing))}")
+
+        has_versions = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+        ).fetchone()
+        version = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] if has_versions else 0
+        if (version or 0) > len(MIGRATIONS):
+            raise ValueError("the backup was made by a newer version of this app")
+
+        if not conn.execute('SELECT 1 FROM user WHERE is_admin').fetchone():
+            raise ValueError("the backup has no admin account")
+    finally:
+        conn.close()
+
+def restore_database(source_path):
+    """
+    Replaces the contents of the live database with a validated backup.
+
+    The backup API writes the new pages into the existing database file under
+    SQLite's write lock, so connections held by other requests and workers stay
+    valid and simply see the restored data once the copy commits. The file at
+    source_path is a staged copy and may be rewritten.
+    """
+    def report(status, remaining, total):
+        app.logger.info("Restoring database: %d of %d pages copied", total - remaining, total)
+
+    with restore_lock:
+        # A WAL database cannot change its page size, so the backup API refuses to
+        # copy in one with a different size; rebuild the staged copy to match first.
+        page_size = db.session.execute(db.text('PRAGMA page_size')).scalar()
+        source = sqlite3.connect(source_path)
+        try:
+            if source.execute('PRAGMA page_size').fetchone()[0] != page_size:
+                source.execute('PRAGMA journal_mode=DELETE')
+                source.execute(f'PRAGMA page_size={int(page_size)}')
+                source.execute('VACUUM')
+        finally:
+            source.close()
+
+        # Remember the highest collection version and sync sequence handed out so far, see below.
+        previous_version = db.session.scalar(db.select(db.func.max(User.collection_version))) or 0
+        previous_change = db.session.scalar(db.select(db.func.max(MovieChange.id))) or 0
+        db.session.remove()
+
+        source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+        raw_conn = db.engine.raw_connection()
+        try:
+            source.backup(
+                raw_conn.driver_connection,
+                pages=app.config['BACKUP_PAGES_PER_STEP'],
+                progress=report,
+            )
+        finally:
+            raw_conn.close()
+            source.close()
+
+        # Older backups are upgraded to the current schema before use.
+        init_db(rebuild_search_index=True)
+
+        # Restored collections must never reuse a version (and so an ETag) that
+        # clients saw before the restore, so they all move past the old maximum.
+        with db.engine.begin() as conn:
+            conn.execute(db.update(User).values(
+                collection_version=User.collection_version + previous_version + 1
+            ))
+
+            # Likewise, the restored change log moves past every sync cursor handed
+            # out before, behind a 'reset' entry per user so syncing clients start over.
+            user_ids = conn.execute(db.select(User.id).order_by(User.id)).scalars().all()
+            highest = max(previous_change, conn.execute(db.select(db.func.max(MovieChange.id))).scalar() or 0)
+            conn.execute(db.update(MovieChange).values(id=MovieChange.id + highest + len(user_ids) + 1))
+            if user_ids:
+                conn.execute(db.insert(MovieChange), [
+                    {'id': highest + i, 'user_id': user_id, 'movie_id': None, 'op': 'reset'}
+                    for i, user_id in enumerate(user_ids, start=1)
+                ])
+            # AUTOINCREMENT only tracks inserted ids, so point it past the shifted ones.
+            conn.execute(db.text(
+                "UPDATE sqlite_sequence SET seq = (SELECT MAX(id) FROM movie_change) WHERE name = 'movie_change'"
+            ))
+
+    collection_cache.clear()
+
+
+# --- Bulk Movie Import ---
+# Errors kept for reporting back; further errors are only counted.
+MAX_REPORTED_IMPORT_ERRORS = 20
+
+def read_movie_rows(stream, filename):
+    """
+    Yields one dict per movie from a CSV, JSON Lines or JSON file.
+
+    CSV and JSON Lines files are read row by row, so large files never have to
+    fit in memory. Plain JSON files must hold a list of objects and are parsed
+    in one go. Unparseable JSON lines are yielded as None. A CSV file that
+    cannot be read any further (e.g. an oversized field) raises ValueError.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if filename.endswith('.csv'):
+        row_number = 0
+        try:
+            for row in csv.DictReader(text):
+                row_number += 1
+                yield row
+        except csv.Error as e:
+            raise ValueError(f"row {row_number + 1}: {e}") from None
+    elif filename.endswith('.jsonl'):
+        for line in text:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    elif filename.endswith('.json'):
+        data = json.load(text)
+        if not isinstance(data, list):
+            raise ValueError("a JSON import must contain a list of movies")
+        yield from data
+    else:
+        raise ValueError("unsupported file type, use .csv, .json or .jsonl")
+
+def clean_movie_row(row, partial=False):
+    """
+    Validates one imported row and returns the column values to insert.
+
+    With partial=True only the fields present in the row are validated and
+    returned, for edits to existing movies.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("not a movie object")
+    # An explicit null counts as an empty field, so a partial edit can clear the barcode.
+    fields = {str(key).strip().lower(): '' if value is None else str(value).strip()
+              for key, value in row.items() if key is not None}
+    values = {}
+
+    if 'name' in fields or not partial:
+        name = fields.get('name', '')
+        if not name or len(name) > 200:
+            raise ValueError("a name of 1 to 200 characters is required")
+        values['name'] = name
+
+    # Choices are matched case-insensitively but stored in their canonical spelling.
+    if 'format' in fields or not partial:
+        formats = {choice.lower(): choice for choice in FORMAT_CHOICES}
+        values['format'] = formats.get(fields.get('format', '').lower())
+        if not values['format']:
+            raise ValueError(f"format must be one of: {', '.join(FORMAT_CHOICES)}")
+    if 'condition' in fields or not partial:
+        conditions = {choice.lower(): choice for choice in CONDITION_CHOICES}
+        values['condition'] = conditions.get(fields.get('condition', '').lower())
+        if not values['condition']:
+            raise ValueError(f"condition must be one of: {', '.join(CONDITION_CHOICES)}")
+
+    if 'barcode' in fields or not partial:
+        barcode = fields.get('barcode') or None
+        if barcode and len(barcode) > 50:
+            raise ValueError("barcode must be at most 50 characters")
+        values['barcode'] = barcode
+        values['upc'] = normalize_upc(barcode)
+
+    return values
+
+def barcode_key(values):
+    """Key used to spot duplicate barcodes: the normalized UPC, or the barcode as entered if it isn't one."""
+    return values.get('upc') or values.get('barcode') or None
+
+def find_owned_barcodes(user_id, keys):
+    """
+    Returns {barcode key: movie name} for movies in the collection matching any of the keys.
+
+    Normalized UPCs are found through the (user_id, upc) index; other barcodes
+    are compared as entered.
+    """
+    upcs = [key for key in keys if normalize_upc(key) == key]
+    barcodes = [key for key in keys if normalize_upc(key) != key]
+    conditions = []
+    if upcs:
+        conditions.append(Movie.upc.in_(upcs))
+    if barcodes:
+        conditions.append(Movie.barcode.in_(barcodes))
+    if not conditions:
+        return {}
+    owned = {}
+    for upc, barcode, name in db.session.execute(
+            db.select(Movie.upc, Movie.barcode, Movie.name).where(Movie.user_id == user_id, db.or_(*conditions))):
+        owned.setdefault(upc or barcode, name)
+    return owned
+
+def import_movies(user_id, rows, batch_size=None):
+    """
+    Adds movies to a user's collection in batched transactions.
+
+    Rows whose barcode is already in the collection (or earlier in the same
+    import) are skipped; barcodes that are valid UPCs or EANs match however
+    they were written. Returns a summary dict with the number of rows inserted,
+    duplicates skipped, invalid rows and the first few error and duplicate messages.
+    """
+    batch_size = batch_size or app.config['IMPORT_BATCH_SIZE']
+    summary = {'inserted': 0, 'duplicates': 0, 'invalid': 0, 'errors': [], 'warnings': []}
+
+    def skip_duplicate(row_number, values, owned_name):
+        summary['duplicates'] += 1
+        if len(summary['warnings']) < MAX_REPORTED_IMPORT_ERRORS:
+            summary['warnings'].append(f"Row {row_number}: skipped '{values['name']}', its barcode "
+                                       f"{values['barcode']} matches '{owned_name}'.")
+
+    def flush(batch):
+        # One indexed lookup per batch finds barcodes the collection already has.
+        owned = find_owned_barcodes(user_id, {barcode_key(values) for _, values in batch} - {None})
+        new_rows = []
+        for row_number, values in batch:
+            if barcode_key(values) in owned:
+                skip_duplicate(row_number, values, owned[barcode_key(values)])
+            else:
+                new_rows.append(values)
+        if new_rows:
+            # A list of parameter sets makes SQLAlchemy use a single executemany.
+            db.session.execute(db.insert(Movie), new_rows)
+            db.session.commit()
+            collection_cache.invalidate_user(user_id)
+        summary['inserted'] += len(new_rows)
+
+    # Names of the rows already accepted in this import, by barcode key.
+    seen_barcodes = {}
+    batch = []
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                values = clean_movie_row(row)
+            except ValueError as e:
+                summary['invalid'] += 1
+                if len(summary['errors']) < MAX_REPORTED_IMPORT_ERRORS:
+                    summary['errors'].append(f"Row {row_number}: {e}")
+                continue
+
+            key = barcode_key(values)
+            if key:
+                if key in seen_barcodes:
+                    skip_duplicate(row_number, values, seen_barcodes[key])
+                    continue
+                seen_barcodes[key] = values['name']
+
+            values['user_id'] = user_id
+            batch.append((row_number, values))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except ValueError as e:
+        # Earlier batches are already committed; say so rather than implying nothing was added.
+        if summary['inserted']:
+            raise ValueError(f"{e} ({summary['inserted']} movies from earlier rows were already added)") from None
+        raise
+    if batch:
+        flush(batch)
+    return summary
+
+@app.cli.command('import-movies')
+@click.argument('username')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Rows per transaction.')
+def import_movies_command(username, path, batch_size):
+    """Imports movies from a CSV, JSON or JSON Lines file into USERNAME's collection."""
+    init_db()
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f"No user named '{username}'.")
+
+    started = time.monotonic()
+    with open(path, 'rb') as f:
+        try:
+            summary = import_movies(user.id, read_movie_rows(f, path.lower()), batch_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    elapsed = time.monotonic() - started
+
+    for message in summary['errors'] + summary['warnings']:
+        click.echo(message, err=True)
+    click.echo(f"Inserted {summary['inserted']} movies, skipped {summary['duplicates']} duplicates "
+               f"and {summary['invalid']} invalid rows in {elapsed:.2f}s "
+               f"({summary['inserted'] / max(elapsed, 1e-9):.0f} rows/s).")
+
+
+# --- Batch Edits ---
+# Fields a batch edit may change; the normalized UPC follows the barcode.
+BATCH_EDIT_FIELDS = ('name', 'format', 'condition', 'barcode')
+
+class MoviesNotFound(LookupError):
+    """Raised when a batch refers to movies that are not in the user's collection."""
+
+    def __init__(self, movie_ids):
+        super().__init__(f"movies not found: {', '.join(map(str, movie_ids))}")
+        self.movie_ids = movie_ids
+
+def apply_movie_batch(user_id, updates=(), deletes=()):
+    """
+    Edits and deletes movies in a user's collection in a single transaction.
+
+    updates is a list of dicts, each with a movie 'id' and the BATCH_EDIT_FIELDS
+    to change; deletes is a list of movie ids. Ownership of every movie is
+    checked with one query, and nothing changes unless the whole batch is valid:
+    invalid edits raise ValueError, and movies outside the collection raise
+    MoviesNotFound. Returns the number of movies updated and deleted.
+    """
+    edits = []
+    for update in updates:
+        if not isinstance(update, dict) or type(update.get('id')) is not int:
+            raise ValueError("each update needs an integer movie id")
+        fields = {key: value for key, value in update.items() if key != 'id'}
+        unknown = set(fields) - set(BATCH_EDIT_FIELDS)
+        if unknown:
+            raise ValueError(f"movie {update['id']}: unknown fields {', '.join(sorted(map(str, unknown)))}; "
+                             f"only {', '.join(BATCH_EDIT_FIELDS)} can be changed")
+        try:
+            values = clean_movie_row(fields, partial=True)
+        except ValueError as e:
+            raise ValueError(f"movie {update['id']}: {e}") from None
+        if not values:
+            raise ValueError(f"movie {update['id']}: nothing to change")
+        edits.append(dict(values, id=update['id']))
+
+    if any(type(movie_id) is not int for movie_id in deletes):
+        raise ValueError("movie ids to delete must be integers")
+    delete_ids = set(deletes)
+    edit_ids = [edit['id'] for edit in edits]
+    if len(set(edit_ids)) != len(edit_ids) or delete_ids & set(edit_ids):
+        raise ValueError("each movie may appear in the batch only once")
+    movie_ids = delete_ids | set(edit_ids)
+    if not movie_ids:
+        raise ValueError("no movies selected")
+    if len(movie_ids) > app.config['MAX_BATCH_EDIT_SIZE']:
+        raise ValueError(f"at most {app.config['MAX_BATCH_EDIT_SIZE']} movies can be changed at once")
+
+    try:
+        owned = set(db.session.scalars(
+            db.select(Movie.id).where(Movie.user_id == user_id, Movie.id.in_(movie_ids))
+        ))
+        if owned != movie_ids:
+            raise MoviesNotFound(sorted(movie_ids - owned))
+        if edits:
+            # A list of dicts keyed by primary key is one executemany per set of changed columns.
+            db.session.execute(db.update(Movie), edits)
+        if delete_ids:
+            db.session.execute(db.delete(Movie).where(Movie.user_id == user_id, Movie.id.in_(delete_ids)))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    collection_cache.invalidate_user(user_id)
+    return {'updated': len(edits), 'deleted': len(delete_ids)}
+
+
+# --- Collection Export ---
+# Exported columns match what the bulk import reads, so exports can be re-imported.
+EXPORT_COLUMNS = ['name', 'format', 'condition', 'barcode', 'date_added']
+
+def iter_user_movies(user_id):
+    """Yields a user's movies as plain rows, fetched from the database in batches."""
+    query = (
+        db.select(*(getattr(Movie, column) for column in EXPORT_COLUMNS))
+        .where(Movie.user_id == user_id)
+        .order_by(Movie.id)
+        .execution_options(yield_per=app.config['EXPORT_BATCH_SIZE'])
+    )
+    for row in db.session.execute(query):
+        values = row._asdict()
+        if values['date_added'] is not None:
+            values['date_added'] = values['date_added'].isoformat(sep=' ')
+        yield values
+
+def generate_csv_export(rows):
+    """Encodes rows as CSV, yielding one chunk per database batch."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % app.config['EXPORT_BATCH_SIZE'] == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def generate_jsonl_export(rows):
+    """Encodes rows as JSON Lines, yielding one chunk per database batch."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row) + '\n')
+        if len(lines) >= app.config['EXPORT_BATCH_SIZE']:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+EXPORT_FORMATS = {
+    'csv': (generate_csv_export, 'text/csv'),
+    'jsonl': (generate_jsonl_export, 'application/x-ndjson'),
+}
+
 
 # --- Routes ---
 @app.route('/')
@@ -294,34 +1947,27 @@ def index():
     
     user = db.session.get(User, session['user_id'])
     
-    # Base query for the logged-in user's movies
-    query = Movie.query.filter_by(user_id=user.id)
-    
-    # Search
-    search_term = request.args.get('search')
-    if search_term:
-        query = query.filter(Movie.name.ilike(f'%{search_term}%'))
-        
-    # Filter
-    filter_format = request.args.get('filter_format')
-    if filter_format:
-        query = query.filter_by(format=filter_format)
-        
-    # Sort
-    sort_by = request.args.get('sort', 'name_asc')
-    if sort_by == 'name_asc':
-        query = query.order_by(Movie.name.asc())
-    elif sort_by == 'name_desc':
-        query = query.order_by(Movie.name.desc())
-    elif sort_by == 'date_added_desc':
-        query = query.order_by(Movie.date_added.desc())
-    elif sort_by == 'date_added_asc':
-        query = query.order_by(Movie.date_added.asc())
-    
-    movies = query.all()
+    movies, next_cursor, prev_cursor = cached_collection_page(user.id, user.collection_version, request.args)
+
+    # Page links keep the current search, sort and filter settings.
+    page_args = {k: v for k, v in request.args.items() if k not in ('after', 'before')}
+    next_url = url_for('index', **page_args, after=next_cursor) if next_cursor else None
+    prev_url = url_for('index', **page_args, before=prev_cursor) if prev_cursor else None
     
-    full_template = BASE_TEMPLATE.replace('{{ content|safe }}', INDEX_PAGE_CONTENT)
-    return render_template_string(full_template, title="My Collection", movies=movies, user=user)
+    return render_template('index.html', title="My Collection", movies=movies, user=user,
+                           per_page=get_per_page(request.args), next_url=next_url, prev_url=prev_url,
+                           format_counts=cached_collection_stats(user.id, user.collection_version, format_counts),
+                           format_choices=FORMAT_CHOICES, condition_choices=CONDITION_CHOICES)
+
+@app.route('/stats')
+def stats():
+    """Shows a summary of the current user's collection."""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    version = get_collection_version(session['user_id'])
+    return render_template('stats.html', title="Statistics",
+                           stats=cached_collection_stats(session['user_id'], version))
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -329,17 +1975,43 @@ def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
+        throttle_keys = [
+            (f'user:{username}', app.config['LOGIN_MAX_FAILURES_PER_USERNAME']),
+            (f'ip:{request.remote_addr}', app.config['LOGIN_MAX_FAILURES_PER_IP']),
+        ]
+
+        # Throttled attempts are refused before spending any time on hashing.
+        retry_after = max(login_retry_after(key, limit) for key, limit in throttle_keys)
+        if retry_after:
+            flash(f'Too many failed login attempts. Please try again in {retry_after} seconds.', 'danger')
+            return render_template('login.html', title="Login"), 429
+
         user = User.query.filter_by(username=username).first()
+        try:
+            valid = bool(user and user.check_password(password))
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('login.html', title="Login"), 503
+
+        # Upgrading an old hash can wait for a later login if the pool is busy.
+        if valid and user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except HashingBusy:
+                pass
 
-        if user and user.check_password(password):
+        if valid:
+            clear_login_failures(throttle_keys[0][0])
             session['user_id'] = user.id
             flash('Logged in successfully!', 'success')
             return redirect(url_for('index'))
         else:
+            for key, _ in throttle_keys:
+                record_login_failure(key)
             flash('Invalid username or password.', 'danger')
     
-    full_template = BASE_TEMPLATE.replace('{{ content|safe }}', LOGIN_PAGE_CONTENT)
-    return render_template_string(full_template, title="Login")
+    return render_template('login.html', title="Login")
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -354,7 +2026,11 @@ def register():
 
         is_first_user = User.query.count() == 0
         new_user = User(username=username, is_admin=is_first_user)
-        new_user.set_password(password)
+        try:
+            new_user.set_password(password)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('register.html', title="Sign Up"), 503
         
         db.session.add(new_user)
         db.session.commit()
@@ -362,8 +2038,7 @@ def register():
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
     
-    full_template = BASE_TEMPLATE.replace('{{ content|safe }}', REGISTER_PAGE_CONTENT)
-    return render_template_string(full_template, title="Sign Up")
+    return render_template('register.html', title="Sign Up")
 
 @app.route('/logout')
 def logout():
@@ -378,18 +2053,70 @@ def add_movie():
     if 'user_id' not in session:
         return redirect(url_for('login'))
 
+    barcode = request.form.get('movie-barcode')
     new_movie = Movie(
         name=request.form.get('movie-name'),
         format=request.form.get('movie-format'),
-        barcode=request.form.get('movie-barcode'),
+        barcode=barcode,
+        upc=normalize_upc(barcode),
         condition=request.form.get('media-condition'),
         user_id=session['user_id']
     )
+    key = barcode_key({'upc': new_movie.upc, 'barcode': barcode})
+    owned = find_owned_barcodes(session['user_id'], {key}) if key else {}
     db.session.add(new_movie)
     db.session.commit()
+    collection_cache.invalidate_user(session['user_id'])
     flash('Movie added to your collection!', 'success')
+    if owned:
+        flash(f"You already had a movie with barcode {barcode}: '{next(iter(owned.values()))}'.", 'warning')
+    elif barcode and not new_movie.upc:
+        flash(f"Barcode {barcode} is not a valid UPC or EAN, so scans won't match it. Check it for typos.", 'warning')
     return redirect(url_for('index'))
 
+@app.route('/import_movies', methods=['POST'])
+def import_movies_upload():
+    """Adds every movie in an uploaded CSV, JSON or JSON Lines file to the current user's collection."""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    file = request.files.get('movies_file')
+    if not file or file.filename == '':
+        flash('No selected file.', 'danger')
+        return redirect(url_for('index'))
+
+    try:
+        summary = import_movies(session['user_id'], read_movie_rows(file.stream, file.filename.lower()))
+    except ValueError as e:
+        db.session.rollback()
+        flash(f"Import stopped: {e}.", 'danger')
+        return redirect(url_for('index'))
+
+    flash(f"Imported {summary['inserted']} movies. Skipped {summary['duplicates']} duplicate barcodes "
+          f"and {summary['invalid']} invalid rows.", 'success' if not summary['invalid'] else 'warning')
+    for error in summary['errors']:
+        flash(error, 'danger')
+    for warning in summary['warnings']:
+        flash(warning, 'warning')
+    return redirect(url_for('index'))
+
+@app.route('/export_movies/<file_format>')
+def export_movies(file_format):
+    """Streams the current user's collection as a CSV or JSON Lines download."""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    if file_format not in EXPORT_FORMATS:
+        abort(404)
+
+    generate, mimetype = EXPORT_FORMATS[file_format]
+    rows = iter_user_movies(session['user_id'])
+    # stream_with_context keeps the database session usable while the response is sent.
+    return Response(
+        stream_with_context(generate(rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=my_movies.{file_format}'},
+    )
+
 @app.route('/delete_movie/<int:movie_id>', methods=['POST'])
 def delete_movie(movie_id):
     """Deletes a movie from the collection."""
@@ -401,12 +2128,43 @@ def delete_movie(movie_id):
     if movie_to_delete and movie_to_delete.user_id == session['user_id']:
         db.session.delete(movie_to_delete)
         db.session.commit()
+        collection_cache.invalidate_user(session['user_id'])
         flash('Movie removed from your collection.', 'success')
     else:
         flash('Movie not found or you do not have permission to delete it.', 'danger')
 
     return redirect(url_for('index'))
 
+@app.route('/batch_movies', methods=['POST'])
+def batch_movies():
+    """Changes the format or condition of, or deletes, the movies selected on the collection page."""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    movie_ids = request.form.getlist('movie_ids', type=int)
+    if not movie_ids:
+        flash('Select at least one movie first.', 'danger')
+        return redirect(url_for('index'))
+
+    try:
+        if request.form.get('action') == 'delete':
+            result = apply_movie_batch(session['user_id'], deletes=movie_ids)
+            flash(f"Removed {result['deleted']} movies from your collection.", 'success')
+        else:
+            changes = {field: request.form.get(f'batch-{field}') for field in ('format', 'condition')
+                       if request.form.get(f'batch-{field}')}
+            if not changes:
+                flash('Choose a new format or condition for the selected movies.', 'danger')
+                return redirect(url_for('index'))
+            result = apply_movie_batch(session['user_id'],
+                                       updates=[dict(changes, id=movie_id) for movie_id in movie_ids])
+            flash(f"Updated {result['updated']} movies.", 'success')
+    except MoviesNotFound:
+        flash('Some of the selected movies were not found in your collection. Nothing was changed.', 'danger')
+    except ValueError as e:
+        flash(f"Nothing was changed: {e}.", 'danger')
+    return redirect(url_for('index'))
+
 # --- Admin Routes ---
 @app.route('/admin')
 def admin_dashboard():
@@ -419,10 +2177,17 @@ def admin_dashboard():
         flash('You do not have permission to access this page.', 'danger')
         return redirect(url_for('index'))
     
-    users_to_manage = User.query.filter(User.id != current_user.id).all()
+    # Each user's movie count comes from one grouped query instead of loading their movies.
+    users_to_manage = db.session.execute(
+        db.select(User, db.func.count(Movie.id))
+        .outerjoin(Movie, Movie.user_id == User.id)
+        .where(User.id != current_user.id)
+        .group_by(User.id)
+        .order_by(User.id)
+    ).all()
     
-    full_template = BASE_TEMPLATE.replace('{{ content|safe }}', ADMIN_PAGE_CONTENT)
-    return render_template_string(full_template, title="Admin Dashboard", users=users_to_manage)
+    return render_template('admin.html', title="Admin Dashboard", users=users_to_manage,
+                           cache_stats=collection_cache.stats())
 
 @app.route('/admin/reset_password/<int:user_id>', methods=['POST'])
 def admin_reset_password(user_id):
@@ -435,8 +2200,13 @@ def admin_reset_password(user_id):
     new_password = request.form.get('new_password')
     
     if user_to_update and new_password:
-        user_to_update.set_password(new_password)
+        try:
+            user_to_update.set_password(new_password)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return redirect(url_for('admin_dashboard'))
         db.session.commit()
+        clear_login_failures(f'user:{user_to_update.username}')
         flash(f"Password for {user_to_update.username} has been reset.", 'success')
     else:
         flash("Failed to reset password.", 'danger')
@@ -450,12 +2220,34 @@ def admin_export_db():
         flash('You do not have permission to perform this action.', 'danger')
         return redirect(url_for('index'))
     
+    if db.engine.dialect.name != 'sqlite':
+        flash('Database export is only supported for SQLite databases.', 'danger')
+        return redirect(url_for('admin_dashboard'))
+
+    compress = request.args.get('compress') == 'gzip'
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
     try:
-        return send_file(db_path, as_attachment=True, download_name='movies_backup.db')
+        backup_database(snapshot_path)
     except Exception as e:
+        remove_database_file(snapshot_path)
         flash(f"Error exporting database: {e}", 'danger')
         return redirect(url_for('admin_dashboard'))
 
+    download_name = 'movies_backup.db.gz' if compress else 'movies_backup.db'
+    headers = {'Content-Disposition': f'attachment; filename={download_name}'}
+    if not compress:
+        headers['Content-Length'] = str(os.path.getsize(snapshot_path))
+    response = Response(
+        stream_file(snapshot_path, compress=compress),
+        mimetype='application/gzip' if compress else 'application/octet-stream',
+        headers=headers,
+    )
+    # The server closes every response, even when the body is never read (HEAD
+    # requests, clients that disconnect early), so the snapshot is always removed.
+    response.call_on_close(lambda: remove_database_file(snapshot_path))
+    return response
+
 @app.route('/admin/import', methods=['POST'])
 def admin_import_db():
     """Allows admin to upload and replace the database."""
@@ -472,29 +2264,286 @@ def admin_import_db():
         flash('No selected file.', 'danger')
         return redirect(url_for('admin_dashboard'))
         
-    if file and file.filename.endswith('.db'):
-        # It's critical to stop using the current DB before replacing it.
-        # In a real production app, you'd need a more robust process.
-        db.session.close_all()
-
-        # Save the uploaded file securely
-        filename = secure_filename(file.filename)
-        temp_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(temp_path)
-        
-        # Replace the old database with the new one
-        shutil.move(temp_path, db_path)
-        
-        flash('Database imported successfully. The application is using the new database.', 'success')
-        # A restart might be needed in some server configurations, but Flask's reloader handles it in debug mode.
-    else:
-        flash('Invalid file type. Please upload a .db file.', 'danger')
+    if not file.filename.endswith(('.db', '.db.gz')):
+        flash('Invalid file type. Please upload a .db or .db.gz file.', 'danger')
+        return redirect(url_for('admin_dashboard'))
 
+    if db.engine.dialect.name != 'sqlite':
+        flash('Database import is only supported for SQLite databases.', 'danger')
+        return redirect(url_for('admin_dashboard'))
+
+    # The upload is staged in a private temporary file; compressed backups are
+    # decompressed while saving.
+    fd, temp_path = tempfile.mkstemp(suffix='.db', dir=app.config['UPLOAD_FOLDER'])
+    try:
+        with os.fdopen(fd, 'wb') as staged:
+            if file.filename.endswith('.gz'):
+                with gzip.GzipFile(fileobj=file.stream) as source:
+                    shutil.copyfileobj(source, staged)
+            else:
+                shutil.copyfileobj(file.stream, staged)
+
+        validate_backup(temp_path)
+
+        started = time.monotonic()
+        restore_database(temp_path)
+        elapsed = time.monotonic() - started
+    except (ValueError, OSError) as e:
+        flash(f"Import rejected: {e}.", 'danger')
+        return redirect(url_for('admin_dashboard'))
+    except (sqlite3.Error, db.exc.SQLAlchemyError) as e:
+        flash(f"Error importing database: {e}", 'danger')
+        return redirect(url_for('admin_dashboard'))
+    finally:
+        remove_database_file(temp_path)
+
+    # The restored database may not contain the account that performed the import.
+    current_user = db.session.get(User, session['user_id'])
+    if not current_user or not current_user.is_admin:
+        session.pop('user_id', None)
+        flash('Database imported successfully. Please log in with an account from the imported database.', 'success')
+        return redirect(url_for('login'))
+
+    flash(f"Database imported successfully in {elapsed:.1f}s: "
+          f"{User.query.count()} users and {Movie.query.count()} movies.", 'success')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/metrics')
+def metrics():
+    """Exposes this process's metrics in the Prometheus text format, to admins only."""
+    token = app.config['METRICS_TOKEN']
+    authorized = bool(token) and hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()
+    )
+    if not authorized:
+        user = db.session.get(User, session['user_id']) if 'user_id' in session else None
+        if not user or not user.is_admin:
+            abort(403)
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    stats = collection_cache.stats()
+    for name in ('hits', 'misses', 'evictions', 'invalidations'):
+        lines.append(f'# HELP filmmagraphy_collection_cache_{name}_total Collection cache {name}.')
+        lines.append(f'# TYPE filmmagraphy_collection_cache_{name}_total counter')
+        lines.append(f'filmmagraphy_collection_cache_{name}_total {stats[name]}')
+    lines.append('# HELP filmmagraphy_collection_cache_entries Pages currently in the collection cache.')
+    lines.append('# TYPE filmmagraphy_collection_cache_entries gauge')
+    lines.append(f'filmmagraphy_collection_cache_entries {stats["entries"]}')
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+# --- JSON API (v1) ---
+# The API uses the same login session as the website. Collection responses carry
+# an ETag built from the user's collection version, so clients polling with
+# If-None-Match get a 304 after a single primary-key lookup on the user table.
+def api_error(message, status):
+    """Builds a JSON error response."""
+    return jsonify(error=message), status
+
+def collection_etag(user_id, version):
+    """Returns the ETag for a version of a user's collection."""
+    return f'v1-{user_id}-{version}'
+
+def api_response(payload, etag, status=200):
+    """Builds a JSON response that clients must revalidate with its ETag."""
+    response = jsonify(payload)
+    response.status_code = status
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag):
+    """Returns a 304 response if the client already has this ETag, otherwise None."""
+    # Weak comparison, since compressed responses carry a weak version of the ETag.
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+@app.route('/api/v1/movies', methods=['GET'])
+def api_list_movies():
+    """Lists the user's movies, with the same search, sort, filter and paging parameters as the collection page."""
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    version = get_collection_version(session['user_id'])
+    etag = collection_etag(session['user_id'], version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    movies, next_cursor, prev_cursor = cached_collection_page(session['user_id'], version, request.args)
+    return api_response({
+        'movies': movies,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+    }, etag)
+
+@app.route('/api/v1/stats', methods=['GET'])
+def api_stats():
+    """Returns the user's movie counts in total, per format, per condition and per month added."""
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    version = get_collection_version(session['user_id'])
+    etag = collection_etag(session['user_id'], version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    stats = cached_collection_stats(session['user_id'], version)
+    return api_response(dict(stats, months=[{'month': month, 'count': count} for month, count in stats['months']]), etag)
+
+@app.route('/api/v1/movies/lookup', methods=['GET'])
+def api_lookup_barcode():
+    """Finds the user's movies with a scanned UPC or EAN barcode, to check whether a disc is already owned."""
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    upc = normalize_upc(request.args.get('barcode'))
+    if not upc:
+        return api_error('barcode must be a valid UPC or EAN.', 400)
+
+    etag = collection_etag(session['user_id'], get_collection_version(session['user_id']))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    movies = db.session.scalars(
+        db.select(Movie).where(Movie.user_id == session['user_id'], Movie.upc == upc).order_by(Movie.id)
+    ).all()
+    return api_response({
+        'upc': upc,
+        'owned': bool(movies),
+        'movies': [movie_to_dict(movie) for movie in movies],
+    }, etag)
+
+@app.route('/api/v1/movies/<int:movie_id>', methods=['GET'])
+def api_get_movie(movie_id):
+    """Returns a single movie from the user's collection."""
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    etag = collection_etag(session['user_id'], get_collection_version(session['user_id']))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    movie = db.session.get(Movie, movie_id)
+    if not movie or movie.user_id != session['user_id']:
+        return api_error('Movie not found.', 404)
+    return api_response(movie_to_dict(movie), etag)
+
+@app.route('/api/v1/movies', methods=['POST'])
+def api_create_movie():
+    """Adds a movie to the user's collection from a JSON body."""
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    try:
+        values = clean_movie_row(request.get_json(silent=True))
+    except ValueError as e:
+        return api_error(f'Invalid movie: {e}.', 400)
+
+    movie = Movie(user_id=session['user_id'], **values)
+    db.session.add(movie)
+    db.session.commit()
+    collection_cache.invalidate_user(session['user_id'])
+    etag = collection_etag(session['user_id'], get_collection_version(session['user_id']))
+    response = api_response(movie_to_dict(movie), etag, status=201)
+    response.headers['Location'] = url_for('api_get_movie', movie_id=movie.id)
+    return response
+
+@app.route('/api/v1/movies/<int:movie_id>', methods=['DELETE'])
+def api_delete_movie(movie_id):
+    """Removes a movie from the user's collection."""
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    movie = db.session.get(Movie, movie_id)
+    if not movie or movie.user_id != session['user_id']:
+        return api_error('Movie not found.', 404)
+    db.session.delete(movie)
+    db.session.commit()
+    collection_cache.invalidate_user(session['user_id'])
+    return '', 204
+
+@app.route('/api/v1/movies/batch', methods=['POST'])
+def api_batch_movies():
+    """
+    Applies a batch of edits and deletions from a JSON body in one transaction.
+
+    The body looks like {"update": [{"id": 1, "format": "DVD"}, ...], "delete": [2, 3]}.
+    Either everything is applied or, on any error, nothing is.
+    """
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get('update', []), list) \
+            or not isinstance(body.get('delete', []), list):
+        return api_error('Invalid batch: expected an object with "update" and/or "delete" lists.', 400)
+    try:
+        result = apply_movie_batch(session['user_id'], body.get('update', []), body.get('delete', []))
+    except MoviesNotFound as e:
+        return jsonify(error='Movies not found.', movie_ids=e.movie_ids), 404
+    except ValueError as e:
+        return api_error(f'Invalid batch: {e}.', 400)
+
+    etag = collection_etag(session['user_id'], get_collection_version(session['user_id']))
+    return api_response(result, etag)
+
+@app.route('/api/v1/changes', methods=['GET'])
+def api_changes():
+    """
+    Returns the changes to the user's collection after the 'since' cursor.
+
+    Clients start with since=0, apply each change in order, and pass the
+    returned cursor next time; has_more means another batch is waiting.
+    """
+    if 'user_id' not in session:
+        return api_error('Authentication required.', 401)
+
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', app.config['SYNC_BATCH_SIZE'], type=int)
+    limit = max(1, min(limit, app.config['MAX_SYNC_BATCH_SIZE']))
+
+    # Upserts are joined to the movie's current state; the log keeps only the
+    # latest change per movie, so an upserted movie always still exists.
+    rows = db.session.execute(
+        db.select(MovieChange, Movie)
+        .outerjoin(Movie, db.and_(Movie.id == MovieChange.movie_id, MovieChange.op == 'upsert'))
+        .where(MovieChange.user_id == session['user_id'], MovieChange.id > since)
+        .order_by(MovieChange.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for change, movie in rows:
+        entry = {'seq': change.id, 'op': change.op}
+        if change.op == 'upsert':
+            entry['movie'] = movie_to_dict(movie)
+        elif change.op == 'delete':
+            entry['movie_id'] = change.movie_id
+        changes.append(entry)
+
+    return jsonify(
+        changes=changes,
+        cursor=rows[-1][0].id if rows else since,
+        has_more=has_more,
+    )
+
 
 # --- Main Execution ---
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
     app.run(host='0.0.0.0', port=5002, debug=True)
@@ -0,0 +1,449 @@
+"""
+Performance benchmarks for Filmmagraphy.
+
+Each benchmark runs against a throwaway database in a temporary directory, so
+it never touches movies.db. Usage:
+
+    python benchmark.py import --rows 10000
+    python benchmark.py concurrency --readers 8 --writers 2 --seconds 5
+    python benchmark.py suite --users 5 --titles 5000 --output results.json
+    python benchmark.py suite --compare results.json
+    python benchmark.py compression --titles 5000
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+
+
+def load_app(workdir):
+    """Imports the app configured to use a fresh database inside workdir."""
+    os.environ['FILMMAGRAPHY_DB_PATH'] = os.path.join(workdir, 'benchmark.db')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as filmmagraphy
+    # Export snapshots and staged imports are written here too, not to the repo's uploads/.
+    filmmagraphy.app.config['UPLOAD_FOLDER'] = workdir
+    with filmmagraphy.app.app_context():
+        filmmagraphy.init_db()
+    return filmmagraphy
+
+
+def create_user(filmmagraphy, username):
+    """Adds a user directly, skipping the password hash cost of registration."""
+    user = filmmagraphy.User(username=username, password_hash='-')
+    filmmagraphy.db.session.add(user)
+    filmmagraphy.db.session.commit()
+    return user.id
+
+
+def synthetic_rows(count, prefix):
+    """Generates import rows cycling through every format and condition."""
+    from app import FORMAT_CHOICES, CONDITION_CHOICES
+    for i in range(count):
+        yield {
+            'name': f'{prefix} Movie {i}',
+            'format': FORMAT_CHOICES[i % len(FORMAT_CHOICES)],
+            'condition': CONDITION_CHOICES[i % len(CONDITION_CHOICES)],
+            'barcode': f'{prefix}{i:012d}',
+        }
+
+
+def bench_import(filmmagraphy, rows, single_rows):
+    """Compares one commit per movie (like add_movie) with the batched bulk import."""
+    app, db, Movie = filmmagraphy.app, filmmagraphy.db, filmmagraphy.Movie
+    with app.app_context():
+        user_id = create_user(filmmagraphy, 'single')
+        started = time.perf_counter()
+        for values in synthetic_rows(single_rows, 'S'):
+            db.session.add(Movie(user_id=user_id, **values))
+            db.session.commit()
+        single_elapsed = time.perf_counter() - started
+
+        user_id = create_user(filmmagraphy, 'bulk')
+        started = time.perf_counter()
+        summary = filmmagraphy.import_movies(user_id, synthetic_rows(rows, 'B'))
+        bulk_elapsed = time.perf_counter() - started
+
+    print(f"one commit per row: {single_rows} rows in {single_elapsed:.2f}s "
+          f"({single_rows / single_elapsed:.0f} rows/s)")
+    print(f"batched import:     {summary['inserted']} rows in {bulk_elapsed:.2f}s "
+          f"({summary['inserted'] / bulk_elapsed:.0f} rows/s, "
+          f"batch size {app.config['IMPORT_BATCH_SIZE']})")
+
+
+# The SQLite defaults, used as the baseline the configured pragmas are compared with.
+DEFAULT_SQLITE_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def run_mixed_load(filmmagraphy, user_id, readers, writers, seconds):
+    """Runs reader and writer threads for a fixed time and counts completed operations."""
+    app, db, Movie = filmmagraphy.app, filmmagraphy.db, filmmagraphy.Movie
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def reader():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    # The first page of the collection, as index() loads it.
+                    Movie.query.filter_by(user_id=user_id).order_by(Movie.name, Movie.id).limit(50).all()
+                    key = 'reads'
+                except db.exc.OperationalError:
+                    db.session.rollback()
+                    key = 'errors'
+                with lock:
+                    counts[key] += 1
+
+    def writer():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    db.session.add(Movie(name='Concurrent', format='DVD', condition='Good', user_id=user_id))
+                    db.session.commit()
+                    key = 'writes'
+                except db.exc.OperationalError:
+                    db.session.rollback()
+                    key = 'errors'
+                with lock:
+                    counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def bench_concurrency(filmmagraphy, rows, readers, writers, seconds):
+    """Compares reader/writer throughput with SQLite's defaults and the configured pragmas."""
+    app, db = filmmagraphy.app, filmmagraphy.db
+    with app.app_context():
+        user_id = create_user(filmmagraphy, 'concurrency')
+        filmmagraphy.import_movies(user_id, synthetic_rows(rows, 'C'))
+
+    tuned_pragmas = dict(app.config['SQLITE_PRAGMAS'])
+    for label, pragmas in (('SQLite defaults', DEFAULT_SQLITE_PRAGMAS), ('configured pragmas', tuned_pragmas)):
+        # New connections pick up the pragmas; the journal mode is stored in the file.
+        app.config['SQLITE_PRAGMAS'] = pragmas
+        with app.app_context():
+            db.engine.dispose()
+        counts = run_mixed_load(filmmagraphy, user_id, readers, writers, seconds)
+        print(f"{label:<20} reads {counts['reads'] / seconds:8.0f}/s   "
+              f"writes {counts['writes'] / seconds:6.0f}/s   errors {counts['errors']}")
+
+
+# Word lists for synthetic movie titles.
+TITLE_ADJECTIVES = ['Dark', 'Silent', 'Last', 'Lost', 'Crimson', 'Hidden', 'Final', 'Golden', 'Broken', 'Eternal',
+                    'Frozen', 'Wild', 'Secret', 'Endless', 'Midnight', 'Distant', 'Savage', 'Electric', 'Hollow', 'Iron']
+TITLE_NOUNS = ['Matrix', 'Horizon', 'Empire', 'Voyage', 'Shadow', 'Kingdom', 'Storm', 'Legacy', 'Frontier', 'Protocol',
+               'Harbor', 'Machine', 'Garden', 'River', 'Signal', 'Station', 'Planet', 'Witness', 'Circuit', 'Island']
+
+# Default share of each format in generated collections, roughly a typical shelf.
+DEFAULT_FORMAT_WEIGHTS = 'Blu-ray=35,DVD=35,4K UHD=10,Digital=10,VHS=5,Other=5'
+
+# Password given to every generated user.
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def parse_format_weights(text):
+    """Parses 'Format=weight,...' into a dict."""
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.rpartition('=')
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def upc_with_check_digit(digits):
+    """Appends the GS1 check digit to 11 digits, making a valid UPC-A."""
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(digits)))
+    return digits + str((10 - total % 10) % 10)
+
+
+def generate_movies(rng, count, format_weights):
+    """Generates reproducible movie rows with formats drawn from the given weights."""
+    from app import CONDITION_CHOICES
+    formats, weights = zip(*format_weights.items())
+    for _ in range(count):
+        title = f'The {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}'
+        if rng.random() < 0.3:
+            title += f' {rng.randint(2, 5)}'
+        yield {
+            'name': title,
+            'format': rng.choices(formats, weights)[0],
+            'condition': rng.choice(CONDITION_CHOICES),
+            'barcode': upc_with_check_digit(''.join(rng.choice('0123456789') for _ in range(11))),
+        }
+
+
+def seed_database(filmmagraphy, rng, users, titles, format_weights):
+    """Creates users x titles movies. The first user is the admin the benchmarks log in as."""
+    app, db, User = filmmagraphy.app, filmmagraphy.db, filmmagraphy.User
+    with app.app_context():
+        # Hash the shared password once; hashing per user would dominate seeding.
+        password_hash = filmmagraphy.hash_password(BENCHMARK_PASSWORD)
+        for i in range(users):
+            user = User(username=f'user{i}', password_hash=password_hash, is_admin=(i == 0))
+            db.session.add(user)
+            db.session.commit()
+            filmmagraphy.import_movies(user.id, generate_movies(rng, titles, format_weights))
+
+
+def percentile(samples, fraction):
+    """Returns the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(results, name, iterations, request, expected_status=200):
+    """Times a request function and stores p50/p99 latency and throughput under name."""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        request_started = time.perf_counter()
+        response = request(i)
+        latencies.append(time.perf_counter() - request_started)
+        # Reading the body makes streamed responses count in full; closing it runs
+        # their cleanup, such as deleting export snapshots.
+        response.get_data()
+        response.close()
+        if response.status_code != expected_status:
+            raise RuntimeError(f"{name}: expected status {expected_status}, got {response.status_code}")
+    elapsed = time.perf_counter() - started
+    results[name] = {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'throughput_rps': round(iterations / elapsed, 1),
+    }
+    print(f"{name:<48} p50 {results[name]['p50_ms']:9.2f} ms   p99 {results[name]['p99_ms']:9.2f} ms   "
+          f"{results[name]['throughput_rps']:8.1f} req/s")
+
+
+def run_suite(filmmagraphy, rng, iterations, slow_iterations):
+    """Drives every scenario through Flask's test client and returns the results."""
+    app = filmmagraphy.app
+    results = {}
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'user0', 'password': BENCHMARK_PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError("could not log in as the benchmark admin")
+
+    # Collection page: every sort order, with and without a format filter and a search.
+    search_term = rng.choice(TITLE_NOUNS).lower()[:4]
+    for sort in ('name_asc', 'name_desc', 'date_added_asc', 'date_added_desc', 'relevance'):
+        for filter_format in ('', 'DVD'):
+            for search in ('', search_term):
+                if sort == 'relevance' and not search:
+                    continue
+                query = f'/?sort={sort}&filter_format={filter_format}&search={search}'
+                name = f'index sort={sort} format={filter_format or "all"} search={search or "-"}'
+                measure(results, name, iterations, lambda i: client.get(query))
+
+    # Paging deep into the collection follows the next-page cursors.
+    cursors = []
+    page = client.get('/api/v1/movies?sort=name_asc&per_page=50').get_json()
+    while page['next_cursor'] and len(cursors) < iterations:
+        cursors.append(page['next_cursor'])
+        page = client.get(f'/api/v1/movies?sort=name_asc&per_page=50&after={cursors[-1]}').get_json()
+    if cursors:
+        measure(results, 'index next pages', len(cursors),
+                lambda i: client.get(f'/?sort=name_asc&per_page=50&after={cursors[i]}'))
+
+    measure(results, 'stats', iterations, lambda i: client.get('/stats'))
+
+    # Writes: add movies, then delete the same ones.
+    from app import FORMAT_CHOICES, CONDITION_CHOICES
+    measure(results, 'add_movie', iterations, lambda i: client.post('/add_movie', data={
+        'movie-name': f'Benchmark Addition {i}',
+        'movie-format': FORMAT_CHOICES[i % len(FORMAT_CHOICES)],
+        'media-condition': CONDITION_CHOICES[i % len(CONDITION_CHOICES)],
+    }), expected_status=302)
+    with app.app_context():
+        added = [movie.id for movie in filmmagraphy.Movie.query.filter(
+            filmmagraphy.Movie.name.like('Benchmark Addition %')).all()]
+    measure(results, 'delete_movie', len(added),
+            lambda i: client.post(f'/delete_movie/{added[i]}'), expected_status=302)
+
+    # One batch request changing 100 movies.
+    batch_ids = [movie['id'] for movie in client.get('/api/v1/movies?per_page=100').get_json()['movies']]
+    measure(results, f'batch update {len(batch_ids)}', iterations, lambda i: client.post('/api/v1/movies/batch', json={
+        'update': [{'id': movie_id, 'condition': CONDITION_CHOICES[i % len(CONDITION_CHOICES)]} for movie_id in batch_ids],
+    }))
+
+    # Login pays the full password hash cost, so it runs fewer times.
+    login_client = app.test_client()
+    measure(results, 'login', slow_iterations, lambda i: login_client.post(
+        '/login', data={'username': 'user0', 'password': BENCHMARK_PASSWORD}), expected_status=302)
+
+    # Exports and a full restore of the exported backup.
+    measure(results, 'export_movies csv', slow_iterations, lambda i: client.get('/export_movies/csv'))
+    measure(results, 'export_movies jsonl', slow_iterations, lambda i: client.get('/export_movies/jsonl'))
+    measure(results, 'admin_export_db', slow_iterations, lambda i: client.get('/admin/export'))
+    with client.get('/admin/export') as response:
+        backup = response.get_data()
+    measure(results, 'admin_import_db', slow_iterations, lambda i: client.post(
+        '/admin/import', data={'db_file': (io.BytesIO(backup), 'benchmark.db')}), expected_status=302)
+    return results
+
+
+def current_commit():
+    """Returns the git commit being benchmarked, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline, results, threshold):
+    """Prints the p50 change of every scenario against a baseline; returns True if any regressed."""
+    regressed = False
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (regression threshold {threshold:.0f}%):")
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if not previous:
+            continue
+        change = (current['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"{name:<48} {previous['p50_ms']:9.2f} -> {current['p50_ms']:9.2f} ms  ({change:+6.1f}%){flag}")
+    return regressed
+
+
+def bench_suite(filmmagraphy, args):
+    """Seeds a synthetic database, runs every scenario and saves or compares the results."""
+    rng = random.Random(args.seed)
+    format_weights = parse_format_weights(args.format_weights)
+    if not args.cache:
+        filmmagraphy.collection_cache.max_entries = 0
+
+    started = time.perf_counter()
+    seed_database(filmmagraphy, rng, args.users, args.titles, format_weights)
+    print(f"Seeded {args.users} users x {args.titles} titles in {time.perf_counter() - started:.1f}s\n")
+
+    results = run_suite(filmmagraphy, rng, args.iterations, args.slow_iterations)
+    report = {
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'parameters': {
+            'users': args.users, 'titles': args.titles, 'format_weights': format_weights,
+            'seed': args.seed, 'iterations': args.iterations, 'slow_iterations': args.slow_iterations,
+            'cache': args.cache,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('parameters') != report['parameters']:
+            print("\nWarning: the baseline was recorded with different parameters.")
+        return not compare_results(baseline, results, args.threshold)
+    return True
+
+
+def bench_compression(filmmagraphy, titles, seed):
+    """Compares response sizes and times with and without compression on a large collection."""
+    app = filmmagraphy.app
+    filmmagraphy.collection_cache.max_entries = 0
+    seed_database(filmmagraphy, random.Random(seed), 1, titles, parse_format_weights(DEFAULT_FORMAT_WEIGHTS))
+    client = app.test_client()
+    client.post('/login', data={'username': 'user0', 'password': BENCHMARK_PASSWORD})
+
+    per_page = app.config['MAX_MOVIES_PER_PAGE']
+    pages = {
+        f'index ({per_page} per page)': f'/?per_page={per_page}',
+        f'api list ({per_page} per page)': f'/api/v1/movies?per_page={per_page}',
+        f'csv export ({titles} titles)': '/export_movies/csv',
+        f'jsonl export ({titles} titles)': '/export_movies/jsonl',
+    }
+    encodings = ['identity', 'gzip'] + (['br'] if filmmagraphy.brotli is not None else [])
+    print(f"{'Response':<32}" + ''.join(f'{encoding:>22}' for encoding in encodings))
+    for name, url in pages.items():
+        client.get(url).get_data()  # warm up
+        cells = []
+        for encoding in encodings:
+            started = time.perf_counter()
+            response = client.get(url, headers={'Accept-Encoding': encoding})
+            size = len(response.get_data())
+            elapsed = time.perf_counter() - started
+            if encoding == 'identity':
+                identity_size = size
+                cells.append(f'{size:>10,} B {elapsed * 1000:6.1f} ms')
+            else:
+                cells.append(f'{size:>8,} B {size / identity_size:5.1%} {elapsed * 1000:5.1f}ms')
+        print(f'{name:<32}' + ''.join(f'{cell:>22}' for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Bulk import throughput.')
+    import_parser.add_argument('--rows', type=int, default=10000, help='Rows for the batched import.')
+    import_parser.add_argument('--single-rows', type=int, default=500,
+                               help='Rows for the one-commit-per-row comparison.')
+
+    concurrency_parser = subparsers.add_parser('concurrency', help='Reader/writer throughput under threads.')
+    concurrency_parser.add_argument('--rows', type=int, default=10000, help='Movies in the collection being read.')
+    concurrency_parser.add_argument('--readers', type=int, default=8, help='Reader threads.')
+    concurrency_parser.add_argument('--writers', type=int, default=2, help='Writer threads.')
+    concurrency_parser.add_argument('--seconds', type=float, default=5, help='Duration of each run.')
+
+    suite_parser = subparsers.add_parser('suite', help='Latency and throughput of every route on a synthetic collection.')
+    suite_parser.add_argument('--users', type=int, default=3, help='Users to generate.')
+    suite_parser.add_argument('--titles', type=int, default=5000, help='Movies per user.')
+    suite_parser.add_argument('--format-weights', default=DEFAULT_FORMAT_WEIGHTS,
+                              help='Share of each format, as "Format=weight,...".')
+    suite_parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated data.')
+    suite_parser.add_argument('--iterations', type=int, default=50, help='Requests per scenario.')
+    suite_parser.add_argument('--slow-iterations', type=int, default=5,
+                              help='Requests for login, export and import scenarios.')
+    suite_parser.add_argument('--cache', action='store_true', help='Keep the collection cache enabled.')
+    suite_parser.add_argument('--output', help='Write the results to this JSON file.')
+    suite_parser.add_argument('--compare', help='Compare with results saved by an earlier --output run.')
+    suite_parser.add_argument('--threshold', type=float, default=10,
+                              help='p50 slowdown (percent) reported as a regression by --compare.')
+
+    compression_parser = subparsers.add_parser('compression', help='Response sizes with and without compression.')
+    compression_parser.add_argument('--titles', type=int, default=5000, help='Movies in the collection.')
+    compression_parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated data.')
+
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        filmmagraphy = load_app(workdir)
+        if args.benchmark == 'import':
+            bench_import(filmmagraphy, args.rows, args.single_rows)
+        elif args.benchmark == 'concurrency':
+            bench_concurrency(filmmagraphy, args.rows, args.readers, args.writers, args.seconds)
+        elif args.benchmark == 'suite':
+            passed = bench_suite(filmmagraphy, args)
+        elif args.benchmark == 'compression':
+            bench_compression(filmmagraphy, args.titles, args.seed)
+        with filmmagraphy.app.app_context():
+            filmmagraphy.db.engine.dispose()
+    if args.benchmark == 'suite' and not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+/** Tailwind build for static/css/app.css. The templates live inside app.py. */
+module.exports = {
+  content: ['./app.py'],
+  theme: {
+    extend: {
+      fontFamily: {
+        // Inter if it is installed locally, otherwise the system UI font; nothing is downloaded.
+        sans: ['Inter', 'ui-sans-serif', 'system-ui', '-apple-system', 'Segoe UI', 'Roboto', 'Helvetica Neue', 'Arial', 'sans-serif'],
+      },
+    },
+  },
+  plugins: [],
+};
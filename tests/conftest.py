@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its database path at import time, so point it at a scratch file first.
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix='filmmagraphy-tests-'), 'movies.db')
+os.environ['FILMMAGRAPHY_DB_PATH'] = TEST_DB_PATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as filmmagraphy  # noqa: E402
+
+
+@pytest.fixture
+def app_module():
+    """The app module, with a freshly created database and empty caches."""
+    filmmagraphy.app.config.update(TESTING=True, PASSWORD_HASH_WORKERS=0)
+    with filmmagraphy.app.app_context():
+        filmmagraphy.db.session.remove()
+        filmmagraphy.db.engine.dispose()
+        filmmagraphy.remove_database_file(TEST_DB_PATH)
+        filmmagraphy.init_db()
+        filmmagraphy.collection_cache.clear()
+        yield filmmagraphy
+        filmmagraphy.db.session.remove()
+
+
+@pytest.fixture
+def user(app_module):
+    """A user owning a handful of movies in two formats."""
+    owner = app_module.User(username='owner', password_hash='-', is_admin=True)
+    app_module.db.session.add(owner)
+    app_module.db.session.commit()
+    app_module.import_movies(owner.id, [
+        {'name': f'Movie {i}', 'format': 'DVD' if i % 2 else 'Blu-ray', 'condition': 'Good'}
+        for i in range(10)
+    ])
+    return owner
+
+
+@pytest.fixture
+def client(app_module, user):
+    """A test client logged in as the user."""
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as session:
+        session['user_id'] = user.id
+    return test_client
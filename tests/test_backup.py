@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def upload_folder(app_module, tmp_path):
+    """Points the app's scratch files at an empty directory for the test."""
+    previous = app_module.app.config['UPLOAD_FOLDER']
+    app_module.app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    yield tmp_path
+    app_module.app.config['UPLOAD_FOLDER'] = previous
+
+
+@pytest.mark.parametrize('query', ['', '?compress=gzip'])
+def test_export_removes_snapshot_after_download(client, upload_folder, query):
+    response = client.get(f'/admin/export{query}')
+    assert response.status_code == 200 and response.data
+    response.close()
+    assert list(upload_folder.iterdir()) == []
+
+
+def test_export_removes_snapshot_when_body_is_not_read(client, upload_folder):
+    response = client.head('/admin/export')
+    assert response.status_code == 200
+    response.close()
+    assert list(upload_folder.iterdir()) == []
+
+    # A client that disconnects before the first chunk.
+    response = client.get('/admin/export', buffered=False)
+    response.close()
+    assert list(upload_folder.iterdir()) == []
+
+
+def exported_backup(client, path, page_size=None):
+    """Downloads a backup of the site to path, optionally rewritten with another page size."""
+    response = client.get('/admin/export')
+    path.write_bytes(response.data)
+    response.close()
+    if page_size:
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.execute(f'PRAGMA page_size={page_size}')
+        conn.execute('VACUUM')
+        conn.close()
+    return path
+
+
+def test_restore_backup_with_different_page_size(app_module, client, upload_folder, tmp_path):
+    live_page_size = app_module.db.session.execute(app_module.db.text('PRAGMA page_size')).scalar()
+    backup = exported_backup(client, tmp_path / 'backup.db', page_size=live_page_size * 2)
+    app_module.import_movies(app_module.User.query.first().id, [{'name': 'Added after the backup'}])
+
+    with backup.open('rb') as f:
+        client.post('/admin/import', data={'db_file': (f, 'backup.db')})
+    with client.session_transaction() as session:
+        (category, message), = session['_flashes']
+    assert category == 'success', message
+    assert app_module.Movie.query.count() == 10
+    assert app_module.db.session.execute(app_module.db.text('PRAGMA integrity_check')).scalar() == 'ok'
+
+
+def test_sync_after_restore_sees_new_edits(app_module, client, upload_folder, tmp_path):
+    backup = exported_backup(client, tmp_path / 'backup.db')
+    with backup.open('rb') as f:
+        client.post('/admin/import', data={'db_file': (f, 'backup.db')})
+
+    synced = client.get('/api/v1/changes?since=0&limit=1000').get_json()
+    assert synced['changes'][0]['op'] == 'reset' and not synced['has_more']
+    newest = synced['changes'][-1]['movie']['id']
+
+    response = client.post('/api/v1/movies/batch', json={'update': [{'id': newest, 'name': 'Renamed'}]})
+    assert response.status_code == 200
+
+    changes = client.get(f"/api/v1/changes?since={synced['cursor']}").get_json()['changes']
+    assert [(change['op'], change['movie']['name']) for change in changes] == [('upsert', 'Renamed')]
@@ -0,0 +1,29 @@
+def test_null_barcode_clears_it(app_module, client, user):
+    movie = app_module.Movie.query.filter_by(user_id=user.id).first()
+    movie.barcode, movie.upc = '036000291452', app_module.normalize_upc('036000291452')
+    app_module.db.session.commit()
+
+    response = client.post('/api/v1/movies/batch', json={'update': [{'id': movie.id, 'barcode': None}]})
+    assert response.status_code == 200, response.get_json()
+    app_module.db.session.expire_all()
+    movie = app_module.db.session.get(app_module.Movie, movie.id)
+    assert movie.barcode is None and movie.upc is None
+
+
+def test_null_name_is_rejected(app_module, client, user):
+    movie_id = app_module.Movie.query.filter_by(user_id=user.id).first().id
+    response = client.post('/api/v1/movies/batch', json={'update': [{'id': movie_id, 'name': None}]})
+    assert response.status_code == 400
+    assert 'name' in response.get_json()['error']
+
+
+def test_batch_form_offers_only_standard_formats(app_module, client, user):
+    # add_movie stores whatever format it is sent.
+    app_module.db.session.add(app_module.Movie(name='Odd', format='Betamax', condition='Good', user_id=user.id))
+    app_module.db.session.commit()
+
+    page = client.get('/').get_data(as_text=True)
+    batch_form = page[page.index('name="batch-format"'):page.index('name="batch-condition"')]
+    assert '<option>Betamax</option>' not in batch_form
+    for movie_format in app_module.FORMAT_CHOICES:
+        assert f'<option>{movie_format}</option>' in batch_form
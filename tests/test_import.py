@@ -0,0 +1,33 @@
+import io
+
+import pytest
+
+
+def csv_with_oversized_field(good_rows):
+    """A CSV file whose row after the good ones has a field too large for the csv module."""
+    lines = ['name,format,condition']
+    lines += [f'Movie {i},DVD,Good' for i in range(good_rows)]
+    lines.append('Huge,DVD,' + 'x' * 200_000)
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def test_unreadable_csv_row_is_a_value_error(app_module):
+    rows = app_module.read_movie_rows(io.BytesIO(csv_with_oversized_field(2)), 'movies.csv')
+    assert next(rows)['name'] == 'Movie 0'
+    assert next(rows)['name'] == 'Movie 1'
+    with pytest.raises(ValueError, match='^row 3: '):
+        next(rows)
+
+
+def test_upload_reports_batches_already_added(app_module, client):
+    previous = app_module.app.config['IMPORT_BATCH_SIZE']
+    app_module.app.config['IMPORT_BATCH_SIZE'] = 2
+    try:
+        response = client.post('/import_movies', data={
+            'movies_file': (io.BytesIO(csv_with_oversized_field(5)), 'movies.csv'),
+        }, follow_redirects=True)
+    finally:
+        app_module.app.config['IMPORT_BATCH_SIZE'] = previous
+    assert response.status_code == 200
+    assert b'Import stopped: row 6: ' in response.data
+    assert b'4 movies from earlier rows were already added' in response.data
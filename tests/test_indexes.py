@@ -0,0 +1,50 @@
+import re
+
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import MultiDict
+
+
+def collection_statements(app_module, user_id, args):
+    """Runs query_collection() and returns the movie SELECTs it sent, with their parameters."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'FROM movie' in statement:
+            statements.append((statement, parameters))
+
+    engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        result = app_module.query_collection(user_id, MultiDict(args))
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    return statements, result
+
+
+def query_plan(app_module, statement, parameters):
+    """Returns the detail column of EXPLAIN QUERY PLAN for a statement."""
+    with app_module.db.engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+
+@pytest.mark.parametrize('sort', ['name_asc', 'name_desc', 'date_added_asc', 'date_added_desc'])
+@pytest.mark.parametrize('filter_format', [None, 'DVD'])
+@pytest.mark.parametrize('with_cursor', [False, True])
+def test_collection_page_uses_composite_index(app_module, user, sort, filter_format, with_cursor):
+    args = {'sort': sort, 'per_page': 3}
+    if filter_format:
+        args['filter_format'] = filter_format
+    if with_cursor:
+        _, (_, next_cursor, _) = collection_statements(app_module, user.id, args)
+        assert next_cursor
+        args['after'] = next_cursor
+
+    # The last page of a descending walk also looks for movies without a sort key.
+    statements, (movies, _, _) = collection_statements(app_module, user.id, args)
+    assert movies and 1 <= len(statements) <= 2
+
+    for statement in statements:
+        plan = query_plan(app_module, *statement)
+        assert any(re.match(r'SEARCH movie USING (COVERING )?INDEX ix_movie_user_', step) for step in plan), plan
+        assert not any('TEMP B-TREE' in step for step in plan), plan
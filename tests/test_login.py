@@ -0,0 +1,19 @@
+from werkzeug.security import generate_password_hash
+
+
+def test_login_succeeds_when_rehash_is_busy(app_module, user, monkeypatch):
+    user.password_hash = generate_password_hash('secret', 'pbkdf2:sha256:1000')
+    app_module.db.session.commit()
+    assert user.password_needs_rehash()
+
+    def busy(password):
+        raise app_module.HashingBusy()
+    monkeypatch.setattr(app_module, 'hash_password', busy)
+
+    client = app_module.app.test_client()
+    response = client.post('/login', data={'username': 'owner', 'password': 'secret'})
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert session['user_id'] == user.id
+    # The old hash is kept, to be upgraded on a later login.
+    assert app_module.db.session.get(app_module.User, user.id).password_needs_rehash()
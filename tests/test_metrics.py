@@ -0,0 +1,31 @@
+import pytest
+
+
+@pytest.fixture
+def metrics_token(app_module):
+    """Lets scrapers read /metrics with a bearer token for the test."""
+    app_module.app.config['METRICS_TOKEN'] = 'secret'
+    yield 'secret'
+    app_module.app.config['METRICS_TOKEN'] = None
+
+
+def test_metrics_bearer_token(app_module, metrics_token):
+    client = app_module.app.test_client()
+    assert client.get('/metrics', headers={'Authorization': f'Bearer {metrics_token}'}).status_code == 200
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code != 200
+
+
+def test_metrics_rejects_non_ascii_authorization(app_module, metrics_token):
+    client = app_module.app.test_client()
+    response = client.get('/metrics', headers={'Authorization': 'Bearer sécret'.encode().decode('latin-1')})
+    assert response.status_code != 200 and response.status_code < 500
+
+
+def test_server_timing_is_off_by_default(app_module, client):
+    assert 'Server-Timing' not in client.get('/').headers
+
+    app_module.app.config['SERVER_TIMING'] = True
+    try:
+        assert 'total;dur=' in client.get('/').headers['Server-Timing']
+    finally:
+        app_module.app.config['SERVER_TIMING'] = False
@@ -0,0 +1,42 @@
+import sqlite3
+
+# The schema of databases created before any migration existed.
+ORIGINAL_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL PRIMARY KEY,
+    username VARCHAR(80) NOT NULL UNIQUE,
+    password_hash VARCHAR(200) NOT NULL,
+    is_admin BOOLEAN NOT NULL
+);
+CREATE TABLE movie (
+    id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    format VARCHAR(50) NOT NULL,
+    barcode VARCHAR(50),
+    condition VARCHAR(50) NOT NULL,
+    date_added DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    user_id INTEGER NOT NULL REFERENCES user (id)
+);
+INSERT INTO user VALUES (1, 'owner', '-', 1);
+INSERT INTO movie (name, format, barcode, condition, user_id) VALUES ('Old Movie', 'DVD', '0-36000-29145-2', 'Good', 1);
+"""
+
+
+def test_original_database_is_upgraded(app_module):
+    path = app_module.db.engine.url.database
+    app_module.db.session.remove()
+    app_module.db.engine.dispose()
+    app_module.remove_database_file(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(ORIGINAL_SCHEMA)
+    conn.close()
+
+    app_module.init_db()
+
+    inspector = app_module.db.inspect(app_module.db.engine)
+    indexes = {index['name'] for index in inspector.get_indexes('movie')}
+    assert {index.name for index in app_module.Movie.__table__.indexes} <= indexes
+    movie = app_module.Movie.query.one()
+    assert movie.upc == app_module.normalize_upc('036000291452')
+    version = app_module.db.session.scalar(app_module.db.select(app_module.db.func.max(app_module.schema_version.c.version)))
+    assert version == len(app_module.MIGRATIONS)
@@ -0,0 +1,39 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+
+def walk(app_module, user_id, args, direction, cursor=None):
+    """Follows next ('after') or previous ('before') cursors to the end; returns the pages' movie ids in list order."""
+    pages = []
+    for _ in range(20):
+        page_args = dict(args, **{direction: cursor}) if cursor else args
+        movies, next_cursor, prev_cursor = app_module.query_collection(user_id, MultiDict(page_args))
+        pages.append([movie.id for movie in movies])
+        cursor = next_cursor if direction == 'after' else prev_cursor
+        if not cursor:
+            break
+    else:
+        pytest.fail('pagination did not reach the end of the collection')
+    if direction == 'before':
+        pages.reverse()
+    return [movie_id for page in pages for movie_id in page], next_cursor, prev_cursor
+
+
+@pytest.mark.parametrize('sort', ['date_added_asc', 'date_added_desc'])
+def test_pages_cover_movies_without_a_date(app_module, user, sort):
+    # Movies from older databases may have no date added.
+    movies = app_module.Movie.query.order_by(app_module.Movie.id).all()
+    for movie in movies[2:5]:
+        movie.date_added = None
+    app_module.db.session.commit()
+
+    args = {'sort': sort, 'per_page': 2}
+    expected, _, _ = walk(app_module, user.id, dict(args, per_page=100), 'after')
+    assert sorted(expected) == [movie.id for movie in movies]
+
+    forward, _, last_prev_cursor = walk(app_module, user.id, args, 'after')
+    assert forward == expected
+
+    # Walking back from the last page visits the others in the same order.
+    backward, _, _ = walk(app_module, user.id, args, 'before', last_prev_cursor)
+    assert backward == expected[:-2]